@@ -4,23 +4,35 @@ FFmpeg Converter library modules
 Modular components for video file conversion and analysis.
 """
 
-# Import all public interfaces for easy access
-from .media_analyzer import discover_media, needs_processing, is_direct_play_compatible
-from .language_utils import Action, normalize_language, filter_and_sort_streams
-from .ffmpeg_runner import run, run_simple, ffprobe_streams, get_duration
-from .ffmpeg_builder import build_ffmpeg_cmd
-from .gpu_utils import detect_gpu_acceleration, get_gpu_encoder_params
-from .cache_manager import read_cache_csv, update_cache_entry, gather_files_to_cache
-from .processor import process_file
-from .file_utils import VIDEO_EXTS, format_file_size, display_file_info
+import importlib
 
-__all__ = [
-    'discover_media', 'needs_processing', 'is_direct_play_compatible',
-    'Action', 'normalize_language', 'filter_and_sort_streams',
-    'run', 'run_simple', 'ffprobe_streams', 'get_duration',
-    'build_ffmpeg_cmd',
-    'detect_gpu_acceleration', 'get_gpu_encoder_params',
-    'read_cache_csv', 'update_cache_entry', 'gather_files_to_cache',
-    'process_file',
-    'VIDEO_EXTS', 'format_file_size', 'display_file_info'
-]
\ No newline at end of file
+# Public interfaces by defining module; imported on first access so that
+# importing one light submodule (e.g. for the CLI parser) does not load them all
+_EXPORTS = {
+    'discover_media': 'media_analyzer', 'needs_processing': 'media_analyzer',
+    'is_direct_play_compatible': 'media_analyzer',
+    'Action': 'language_utils', 'normalize_language': 'language_utils',
+    'filter_and_sort_streams': 'language_utils',
+    'run': 'ffmpeg_runner', 'run_simple': 'ffmpeg_runner', 'run_bytes': 'ffmpeg_runner',
+    'ffprobe_streams': 'ffmpeg_runner', 'ffprobe_all': 'ffmpeg_runner', 'get_duration': 'ffmpeg_runner',
+    'build_ffmpeg_cmd': 'ffmpeg_builder',
+    'detect_gpu_acceleration': 'gpu_utils', 'get_gpu_encoder_params': 'gpu_utils',
+    'read_cache_csv': 'cache_manager', 'update_cache_entry': 'cache_manager',
+    'flush_cache': 'cache_manager', 'gather_files_to_cache': 'cache_manager',
+    'process_file': 'processor',
+    'VIDEO_EXTS': 'file_utils', 'iter_video_files': 'file_utils', 'filter_existing': 'file_utils',
+    'stat_existing': 'file_utils', 'format_file_size': 'file_utils', 'display_file_info': 'file_utils',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -3,10 +3,57 @@ CSV cache management for video file processing
 """
 
 import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from .file_utils import VIDEO_EXTS
-from .media_analyzer import analyze_file_for_csv
+from .file_utils import VIDEO_EXTS, iter_video_files
+from .media_analyzer import analyze_file_for_csv, analysis_timestamp
+from .probe_cache import flush_probe_cache
+
+# In-memory cache state per CSV file: rows in file order plus an index by file_path.
+# Updates are applied here and appended to a journal; the CSV itself is only
+# rewritten by flush_cache().
+_cache_state = {}
+_dirty_caches = set()
+
+CSV_FIELDNAMES = (
+    'file_path', 'file_name', 'file_size_bytes', 'file_size_mb',
+    'container', 'video_codec', 'is_hdr', 'audio_codecs', 'audio_channels',
+    'audio_languages', 'has_video', 'has_audio', 'direct_play_compatible', 'action_needed',
+    'analysis_date', 'processed', 'processing_date', 'file_mtime_ns'
+)
+_CSV_HEADER = (','.join(CSV_FIELDNAMES) + '\n').encode('utf-8')
+_CSV_WRITE_BUFFER = 1 << 20
+
+# Columns stored as 'True'/'False' strings in the CSV
+_BOOL_COLUMNS = ('is_hdr', 'has_video', 'has_audio', 'direct_play_compatible')
+
+def _journal_path(csv_path: Path) -> Path:
+    """Sidecar journal file recording cache updates not yet flushed to the CSV"""
+    return csv_path.with_name(csv_path.name + '.journal')
+
+def _replay_journal(csv_path: Path, index: dict):
+    """Apply pending journal updates to the freshly read rows"""
+    journal_path = _journal_path(csv_path)
+    if not journal_path.exists():
+        return False
+    
+    replayed = False
+    with open(journal_path, 'r', encoding='utf-8') as journal:
+        for line in journal:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Ignore a torn last line from an interrupted append
+                continue
+            entry = index.get(record.get('file_path'))
+            if entry is not None:
+                entry['processed'] = record['processed']
+                entry['processing_date'] = record['processing_date']
+                replayed = True
+    return replayed
 
 def read_cache_csv(csv_path: Path):
     """Read cache CSV file and return list of file data"""
@@ -14,76 +61,207 @@ def read_cache_csv(csv_path: Path):
         raise FileNotFoundError(f"Cache-Datei nicht gefunden: {csv_path}")
     
     file_data_list = []
+    append = file_data_list.append
     with open(csv_path, 'r', newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
+        reader = csv.reader(csvfile)
+        header = next(reader, None)
+        if header is None:
+            return _store_cache_state(csv_path, file_data_list)
+        
+        # Resolve column positions once instead of coercing via dict lookups per row
+        columns = {name: i for i, name in enumerate(header)}
+        size_bytes_idx = columns.get('file_size_bytes')
+        size_mb_idx = columns.get('file_size_mb')
+        mtime_idx = columns.get('file_mtime_ns')
+        bool_idxs = tuple((name, columns[name]) for name in _BOOL_COLUMNS if name in columns)
+        processed_idx = columns.get('processed')
+        width = len(header)
+        
+        for values in reader:
+            if len(values) < width:
+                values.extend([''] * (width - len(values)))
+            row = dict(zip(header, values))
+            
             # Convert string bools and numbers back to proper types
-            row['file_size_bytes'] = int(row['file_size_bytes']) if row['file_size_bytes'] else 0
-            row['file_size_mb'] = float(row['file_size_mb']) if row['file_size_mb'] else 0.0
-            row['is_hdr'] = row['is_hdr'].lower() == 'true'
-            row['has_video'] = row['has_video'].lower() == 'true'
-            row['has_audio'] = row['has_audio'].lower() == 'true'
-            row['direct_play_compatible'] = row['direct_play_compatible'].lower() == 'true'
-            row['processed'] = row.get('processed', 'false').lower() == 'true'
-            file_data_list.append(row)
+            if size_bytes_idx is not None:
+                value = values[size_bytes_idx]
+                row['file_size_bytes'] = int(value) if value else 0
+            if size_mb_idx is not None:
+                value = values[size_mb_idx]
+                row['file_size_mb'] = float(value) if value else 0.0
+            if mtime_idx is not None:
+                value = values[mtime_idx]
+                row['file_mtime_ns'] = int(value) if value else None
+            for name, idx in bool_idxs:
+                row[name] = values[idx].lower() == 'true'
+            row['processed'] = processed_idx is not None and values[processed_idx].lower() == 'true'
+            append(row)
+    
+    return _store_cache_state(csv_path, file_data_list)
+
+def _store_cache_state(csv_path: Path, file_data_list):
+    """Register freshly read rows as the in-memory state of a cache file"""
+    index = {row['file_path']: row for row in file_data_list}
+    _cache_state[csv_path] = (file_data_list, index)
+    if _replay_journal(csv_path, index):
+        _dirty_caches.add(csv_path)
     
     return file_data_list
 
+def start_cache(csv_path: Path):
+    """Begin an empty cache whose rows are added during the run and written by flush_cache()"""
+    _cache_state[csv_path] = ([], {})
+    _dirty_caches.add(csv_path)
+    try:
+        _journal_path(csv_path).unlink()
+    except FileNotFoundError:
+        pass
+
+def add_cache_row(csv_path: Path, file_data: dict):
+    """Append an analyze_file_for_csv() row to a cache started with start_cache()"""
+    _coerce_row_types(file_data)
+    file_data_list, index = _cache_state[csv_path]
+    file_data_list.append(file_data)
+    index[file_data['file_path']] = file_data
+    _dirty_caches.add(csv_path)
+
 def update_cache_entry(csv_path: Path, file_path: str, processed: bool = True, processing_date: str = None):
     """Update a single entry in the cache file to mark it as processed"""
-    if not csv_path.exists():
+    if csv_path not in _cache_state:
+        if not csv_path.exists():
+            return
+        read_cache_csv(csv_path)
+    
+    _, index = _cache_state[csv_path]
+    entry = index.get(file_path)
+    if entry is None:
         return
     
-    # Read all entries
-    file_data_list = read_cache_csv(csv_path)
+    entry['processed'] = processed
+    entry['processing_date'] = processing_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    _dirty_caches.add(csv_path)
     
-    # Update the specific entry
-    updated = False
-    for entry in file_data_list:
-        if entry['file_path'] == file_path:
-            entry['processed'] = processed
-            entry['processing_date'] = processing_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            updated = True
-            break
+    # Journal the update so it survives a crash before the next flush
+    with open(_journal_path(csv_path), 'a', encoding='utf-8') as journal:
+        journal.write(json.dumps({
+            'file_path': file_path,
+            'processed': processed,
+            'processing_date': entry['processing_date']
+        }) + '\n')
+
+def flush_cache(csv_path: Path):
+    """Write pending updates of a cache file back to disk"""
+    if csv_path not in _dirty_caches:
+        return
+    
+    file_data_list, _ = _cache_state[csv_path]
+    write_analysis_csv(file_data_list, csv_path)
+    _dirty_caches.discard(csv_path)
     
-    if updated:
-        # Write back to file
-        write_analysis_csv(file_data_list, csv_path)
+    try:
+        _journal_path(csv_path).unlink()
+    except FileNotFoundError:
+        pass
 
-def gather_files_to_cache(root: Path, cache_path: Path):
-    """Gather all video files from root directory and create/update cache file"""
+def flush_all_caches():
+    """Write pending updates of all loaded cache files back to disk"""
+    for csv_path in list(_dirty_caches):
+        flush_cache(csv_path)
+
+def gather_files_to_cache(root: Path, cache_path: Path, max_workers: int = None, refresh: bool = False):
+    """Gather all video files from root directory and create/update cache file
+    
+    With refresh, rows of an existing cache file are not reused.
+    """
     print(f"Sammele Dateien und erstelle Cache: {cache_path}")
     
     file_data_list = []
     total_files = 0
     
+    # Rows of an existing cache can be reused for files that did not change
+    known_rows = {}
+    if cache_path.exists() and not refresh:
+        try:
+            known_rows = {row['file_path']: row for row in read_cache_csv(cache_path)}
+        except (OSError, ValueError, KeyError, csv.Error) as e:
+            print(f"Vorhandene Cache-Datei nicht lesbar, analysiere alles neu: {e}")
+    
     if root.is_file():
         # Single file
         if root.suffix.lower() in VIDEO_EXTS:
             total_files = 1
-            print(f"Analysiere: {root}")
-            file_data = analyze_file_for_csv(root)
+            file_data = _reusable_row(known_rows, root)
+            if file_data is None:
+                print(f"Analysiere: {root}")
+                file_data = analyze_file_for_csv(root)
             file_data_list.append(file_data)
     else:
-        # Directory - collect all video files with better glob filtering
-        video_files = []
-        for ext in VIDEO_EXTS:
-            video_files.extend(root.rglob(f'*{ext}'))
-            video_files.extend(root.rglob(f'*{ext.upper()}'))
-        
-        # Remove duplicates and filter for actual files
-        video_files = list(set([p for p in video_files if p.is_file()]))
+        # Directory - collect all video files in a single scandir pass
+        video_files = list(iter_video_files(root))
         total_files = len(video_files)
         print(f"Gefunden: {total_files} Videodateien")
         
-        for i, p in enumerate(video_files, 1):
-            print(f"Analysiere ({i}/{total_files}): {p.name}")
-            file_data = analyze_file_for_csv(p)
-            file_data_list.append(file_data)
+        results = [_reusable_row(known_rows, p) for p in video_files]
+        to_analyze = [idx for idx, row in enumerate(results) if row is None]
+        if total_files - len(to_analyze):
+            print(f"Unverändert, aus Cache übernommen: {total_files - len(to_analyze)}")
+        
+        # Analysis time is spent waiting on ffprobe subprocesses, so threads
+        # are enough to keep all cores busy; the batch shares one analysis date
+        now_str = analysis_timestamp()
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+            future_to_index = {
+                executor.submit(analyze_file_for_csv, video_files[idx], now_str=now_str): idx
+                for idx in to_analyze
+            }
+            for i, future in enumerate(as_completed(future_to_index), 1):
+                idx = future_to_index[future]
+                print(f"Analysiere ({i}/{len(to_analyze)}): {video_files[idx].name}")
+                results[idx] = future.result()
+        flush_probe_cache()
+        file_data_list.extend(results)
     
-    # Write cache file
+    # Write cache file; a fresh analysis supersedes any pending updates
     write_analysis_csv(file_data_list, cache_path)
-    return file_data_list
+    _dirty_caches.discard(cache_path)
+    try:
+        _journal_path(cache_path).unlink()
+    except FileNotFoundError:
+        pass
+    
+    # Register the rows with the same types read_cache_csv yields, so later
+    # update_cache_entry calls hit the index without re-reading the file
+    for row in file_data_list:
+        _coerce_row_types(row)
+    return _store_cache_state(cache_path, file_data_list)
+
+def _reusable_row(known_rows: dict, path: Path):
+    """Return the cached row for path if size and mtime are unchanged, else None"""
+    row = known_rows.get(str(path))
+    if row is None or row.get('container') == 'ERROR':
+        return None
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    if row.get('file_size_bytes') == st.st_size and row.get('file_mtime_ns') == st.st_mtime_ns:
+        return row
+    return None
+
+def _coerce_row_types(row):
+    """Convert 'True'/'False' strings of an analysis row to booleans in place"""
+    for name in _BOOL_COLUMNS:
+        row[name] = str(row.get(name)).lower() == 'true'
+    row['processed'] = str(row.get('processed')).lower() == 'true'
+
+def _format_csv_field(value):
+    """Format a single CSV field, quoting only when required"""
+    if value is None:
+        return ''
+    text = value if isinstance(value, str) else str(value)
+    if ',' in text or '"' in text or '\n' in text or '\r' in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
 
 def write_analysis_csv(file_data_list, csv_path: Path):
     """Write analysis results to CSV file"""
@@ -91,19 +269,29 @@ def write_analysis_csv(file_data_list, csv_path: Path):
         print("Keine Dateien zu analysieren gefunden.")
         return
     
-    fieldnames = [
-        'file_path', 'file_name', 'file_size_bytes', 'file_size_mb',
-        'container', 'video_codec', 'is_hdr', 'audio_codecs', 'audio_channels',
-        'audio_languages', 'has_video', 'has_audio', 'direct_play_compatible', 'action_needed',
-        'analysis_date', 'processed', 'processing_date'
-    ]
-    
-    with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(file_data_list)
+    # Write to a temp file next to the target and swap it in, so an interrupt
+    # never leaves a truncated cache behind
+    tmp_path = csv_path.with_name(f'.{csv_path.name}.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'wb', buffering=_CSV_WRITE_BUFFER) as csvfile:
+            csvfile.write(_CSV_HEADER)
+            # Row-wise on purpose: a column-wise (struct-of-arrays) pass or csv.writer
+            # is not faster in pure Python, and pyarrow is not a dependency
+            csvfile.writelines(
+                ','.join([_format_csv_field(row.get(name)) for name in CSV_FIELDNAMES]).encode('utf-8') + b'\n'
+                for row in file_data_list
+            )
+            csvfile.flush()
+            os.fsync(csvfile.fileno())
+        os.replace(tmp_path, csv_path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
     
     print(f"Analyse gespeichert in: {csv_path}")
     print(f"Analysierte Dateien: {len(file_data_list)}")
-    compatible_count = sum(1 for data in file_data_list if data.get('direct_play_compatible') == 'True')
+    compatible_count = sum(1 for data in file_data_list if str(data.get('direct_play_compatible')) == 'True')
     print(f"Direct Play kompatibel: {compatible_count}/{len(file_data_list)} ({compatible_count/len(file_data_list)*100:.1f}%)")
\ No newline at end of file
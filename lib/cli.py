@@ -0,0 +1,296 @@
+"""
+Command line workflow: gather, cache-based and direct batch processing
+
+main.py parses the arguments and only then imports this module, so --help and
+usage errors do not pay for loading rich, pydantic and the processing modules.
+"""
+
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from .ffmpeg_runner import setup_signal_handlers, interrupted
+from .language_utils import Action
+from .gpu_utils import detect_gpu_acceleration
+from .cache_manager import read_cache_csv, gather_files_to_cache, flush_cache, start_cache, add_cache_row
+from .media_analyzer import analyze_file_for_csv, analysis_timestamp
+from .probe_cache import open_probe_cache
+from .processor import process_file, iter_probed, wait_for_finalize
+from .file_utils import VIDEO_EXTS, iter_video_files, stat_existing
+from .rich_console import rich_output
+from .models import ProcessingConfig, BatchProcessingStats
+from .parallel_processor import create_parallel_processor
+
+def setup_gpu_acceleration(use_gpu, refresh=False):
+    """Setup and detect GPU acceleration if requested"""
+    if not use_gpu:
+        return None
+        
+    gpu_info = detect_gpu_acceleration(force_refresh=refresh)
+    rich_output.print_gpu_info(gpu_info)
+    
+    return gpu_info
+
+# Counter incremented for each process_file() result; anything else is an error
+_RESULT_COUNTERS = {
+    'converted': 'converted', 'processed': 'converted',
+    'skipped': 'skipped', 'planned': 'skipped', 'filtered': 'skipped',
+    'remuxed': 'remuxed',
+    'interrupted': 'interrupted',
+}
+
+def update_processing_counters(result, counters):
+    """Update processing result counters based on file processing result"""
+    if result == 'quit':
+        return True  # Signal to break processing loop
+    counters[_RESULT_COUNTERS.get(result, 'errors')] += 1
+    # Signal to break processing loop after an interruption
+    return result == 'interrupted'
+
+def collect_video_files(root_path):
+    """Collect all video files from a directory"""
+    return list(iter_video_files(root_path))
+
+# Text identifying each action in the CSV 'action_needed' column
+_ACTION_FILTER_TEXT = {
+    Action.CONTAINER_REMUX: 'Container remux to MP4',
+    Action.REMUX_AUDIO: 'Audio remux to stereo AAC',
+    Action.TRANCODE_VIDEO: 'Video transcode to H.264 SDR',
+    Action.TRANCODE_ALL: 'Full transcode'
+}
+
+def filter_cache_files(file_data_list, action_filter):
+    """Filter cache files that need processing; returns {path: stat result} in cache order"""
+    filter_text = _ACTION_FILTER_TEXT.get(action_filter) if action_filter else None
+    
+    # Column checks first, in one pass: skip processed rows, already compatible
+    # ones (unless an action filter asks for them) and rows not matching the filter
+    candidates = [
+        entry['file_path'] for entry in file_data_list
+        if not entry.get('processed', False)
+        and (action_filter or not entry.get('direct_play_compatible', False))
+        and (filter_text is None or filter_text in entry.get('action_needed', ''))
+    ]
+    
+    # Skip files that no longer exist (the only stat call per row, overlapped
+    # across threads since each one is a round-trip on network shares); the
+    # results are handed on to the probe instead of stat-ing again
+    return {Path(file_path): st for file_path, st in stat_existing(candidates)}
+
+def apply_limit_and_print(files_list, limit, description="Dateien"):
+    """Apply limit to files list and print information"""
+    if limit and limit > 0:
+        files_list = files_list[:limit]
+        rich_output.print_info(f"Beschränke Verarbeitung auf {len(files_list)} {description} (--limit {limit})")
+    return files_list
+
+def process_files_parallel(files, out_dir, cache_path, args, keep_languages, sort_languages, gpu_info, counters, action_filter=None, file_stats=None):
+    """Convert files in several ffmpeg processes at once and update counters"""
+    config = ProcessingConfig(
+        crf=args.crf, preset=args.preset, use_gpu=getattr(args, 'use_gpu', False),
+        delete_original=args.delete_original, keep_languages=keep_languages,
+        sort_languages=sort_languages, action_filter=action_filter
+    )
+    with create_parallel_processor(max_workers=args.workers) as processor:
+        stats = processor.process_batch_parallel(files, config, out_dir, cache_path, gpu_info, file_stats)
+    
+    counters['processed'] += stats.processed_files
+    counters['converted'] += stats.converted_files
+    counters['remuxed'] += stats.remuxed_files
+    counters['skipped'] += stats.skipped_files
+    counters['errors'] += stats.error_files
+    counters['interrupted'] += stats.interrupted_files
+    return counters
+
+def process_files_batch(files, out_dir, cache_path, args, keep_languages, sort_languages, gpu_info, counters, action_filter=None, file_stats=None,
+                        record_rows=False):
+    """Process a batch of files and update counters
+    
+    With record_rows each file's analysis row is added to cache_path (see
+    start_cache()) as soon as it is probed, before the file is processed.
+    """
+    if args.workers > 1 and len(files) > 1:
+        # Confirmations and dry-run output need the sequential, file-by-file flow;
+        # recorded rows must exist in this process before a file is marked processed
+        if args.interactive or args.dry_run or record_rows:
+            rich_output.print_info("--workers wird im interaktiven Modus, bei --dry-run und mit --gather-and-process ignoriert")
+        else:
+            return process_files_parallel(files, out_dir, cache_path, args, keep_languages,
+                                          sort_languages, gpu_info, counters, action_filter, file_stats)
+    
+    auto_yes = False
+    now_str = analysis_timestamp() if record_rows else None
+    
+    # Create batch progress bar
+    progress = rich_output.create_batch_progress()
+    
+    with progress:
+        task_id = progress.add_task("Processing files...", total=len(files))
+        
+        # Probe the next files while the current one is converted
+        for file_path, info in iter_probed(files, file_stats=file_stats):
+            # Check for global interruption
+            if interrupted:
+                rich_output.print_interrupted("Verarbeitung unterbrochen")
+                break
+            
+            target_dir = out_dir if out_dir else file_path.parent
+            try:
+                if record_rows:
+                    add_cache_row(cache_path, analyze_file_for_csv(file_path, now_str=now_str, info=info))
+                res, auto_yes = process_file(
+                    file_path, target_dir, args.crf, args.preset, args.dry_run, args.interactive,
+                    auto_yes, args.debug, keep_languages, sort_languages, gpu_info,
+                    getattr(args, 'use_gpu', False), action_filter,
+                    args.delete_original, cache_path, info, defer_finalize=True
+                )
+                counters['processed'] += 1
+                
+                # Update counters and check for early exit
+                should_break = update_processing_counters(res, counters)
+                if should_break:
+                    break
+                    
+            except Exception as e:
+                rich_output.print_error(f'Fehler bei {file_path}', str(e))
+                counters['errors'] += 1
+            
+            progress.update(task_id, advance=1)
+        
+        # Replacing the last original may still be running in the background
+        failed = wait_for_finalize()
+        counters['converted'] -= failed
+        counters['errors'] += failed
+    
+    return counters
+
+def print_final_summary(counters):
+    """Print final processing summary using Rich"""
+    stats = BatchProcessingStats(
+        total_files=counters['total'],
+        processed_files=counters['processed'],
+        converted_files=counters['converted'],
+        remuxed_files=counters['remuxed'],
+        skipped_files=counters['skipped'],
+        error_files=counters['errors'],
+        interrupted_files=counters['interrupted'],
+        end_time=datetime.now()
+    )
+    rich_output.print_final_summary(stats)
+
+def run(args, keep_languages, sort_languages, action_filter):
+    """Run the converter for parsed and validated command line arguments"""
+    # Setup signal handlers for graceful shutdown
+    setup_signal_handlers()
+    
+    # Print application header
+    rich_output.print_header("FFmpeg Converter for Plex Direct Play")
+    
+    # Check for required tools
+    if shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None:
+        rich_output.print_error('ffmpeg/ffprobe nicht gefunden. Bitte in PATH verfügbar machen.')
+        sys.exit(2)
+    
+    if args.refresh_cache:
+        open_probe_cache(refresh=True)
+    
+    # Setup GPU acceleration
+    gpu_info = setup_gpu_acceleration(getattr(args, 'use_gpu', False), args.refresh_gpu)
+
+    root: Path = args.root
+    if not root.exists():
+        rich_output.print_error(f'Pfad existiert nicht: {root}')
+        sys.exit(2)
+
+    # Handle gather mode - analyze files and export to CSV
+    if args.gather:
+        csv_path = args.gather.resolve()
+        rich_output.print_info(f"Gathering file analysis to: {csv_path}")
+        gather_files_to_cache(root, csv_path, args.jobs, args.refresh_cache)
+        rich_output.print_success(f"Analysis complete: {csv_path}")
+        return
+    
+    # Handle cache-based processing (only when --use-cache is specified)
+    cache_path = None
+    file_data_list = None
+    
+    if args.use_cache:
+        cache_path = args.use_cache.resolve()
+        try:
+            file_data_list = read_cache_csv(cache_path)
+            
+            # Count different file states
+            total_files = len(file_data_list)
+            already_processed = sum(1 for entry in file_data_list if entry.get('processed', False))
+            compatible_files = sum(1 for entry in file_data_list if entry.get('direct_play_compatible', False) and not entry.get('processed', False))
+            need_processing = total_files - already_processed - compatible_files
+            
+            rich_output.print_cache_info(cache_path, total_files, already_processed, compatible_files, need_processing)
+        except FileNotFoundError:
+            # Generate cache file if it doesn't exist
+            rich_output.print_warning(f"Cache-Datei nicht gefunden, erstelle neue: {cache_path}")
+            file_data_list = gather_files_to_cache(root, cache_path, args.jobs, args.refresh_cache)
+
+    out_dir = args.out.resolve() if args.out else None
+    if out_dir:
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Initialize counters
+    counters = {
+        'total': 0,
+        'converted': 0,
+        'skipped': 0,
+        'errors': 0,
+        'remuxed': 0,
+        'interrupted': 0,
+        'processed': 0
+    }
+    
+    # Process files based on cache or direct processing
+    if args.use_cache:
+        file_stats = filter_cache_files(file_data_list, action_filter)
+        files_to_process = apply_limit_and_print(list(file_stats), args.limit)
+        
+        counters['total'] = len(files_to_process)
+        rich_output.print_info(f"Zu verarbeitende Dateien: {counters['total']}")
+        
+        try:
+            process_files_batch(files_to_process, out_dir, cache_path, args, keep_languages, sort_languages, gpu_info, counters, action_filter, file_stats)
+        finally:
+            # Write all processed markers back in one go
+            flush_cache(cache_path)
+                
+    else:
+        # Direct processing without cache; with --gather-and-process the analysis
+        # rows are recorded in the same pass and written to the CSV at the end
+        gather_path = args.gather_and_process.resolve() if args.gather_and_process else None
+        if gather_path:
+            start_cache(gather_path)
+        
+        try:
+            if root.is_file():
+                # Single file processing
+                if root.suffix.lower() not in VIDEO_EXTS:
+                    rich_output.print_error(f'{root} ist keine unterstützte Videodatei')
+                    sys.exit(2)
+                
+                counters['total'] = 1
+                process_files_batch([root], out_dir, gather_path, args, keep_languages, sort_languages, gpu_info, counters, action_filter,
+                                    record_rows=gather_path is not None)
+            else:
+                # Directory processing without cache
+                video_files = collect_video_files(root)
+                video_files = apply_limit_and_print(video_files, args.limit, "Videodateien")
+                
+                counters['total'] = len(video_files)
+                rich_output.print_info(f"Gefunden: {counters['total']} Videodateien")
+                
+                process_files_batch(video_files, out_dir, gather_path, args, keep_languages, sort_languages, gpu_info, counters, action_filter,
+                                    record_rows=gather_path is not None)
+        finally:
+            if gather_path:
+                flush_cache(gather_path)
+
+    # Final summary
+    print_final_summary(counters)
@@ -0,0 +1,231 @@
+"""
+ffprobe-free stream detection for plain MP4 files (moov box scan)
+
+Only the common, unambiguous case is handled: H.264/HEVC video with an explicit
+colour box and AAC-LC audio. Anything else returns None so the caller falls
+back to ffprobe.
+"""
+
+import struct
+from pathlib import Path
+
+# Give up on unusually large movie headers; ffprobe handles those
+_MAX_MOOV_SIZE = 64 << 20
+
+_VIDEO_CODECS = {b'avc1': 'h264', b'avc3': 'h264', b'hvc1': 'hevc', b'hev1': 'hevc'}
+_AAC_OBJECT_TYPES = {0x40, 0x66, 0x67}  # MPEG-4 AAC and MPEG-2 AAC LC
+_AAC_LC = 2
+_CHANNELS_BY_CONFIG = {1: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 6, 7: 8}
+
+# ISO/IEC 23091-2 code points under the names ffprobe reports
+_PRIMARIES = {1: 'bt709', 5: 'bt470bg', 6: 'smpte170m', 9: 'bt2020', 11: 'smpte431', 12: 'smpte432'}
+_TRANSFERS = {1: 'bt709', 6: 'smpte170m', 13: 'iec61966-2-1', 14: 'bt2020-10', 15: 'bt2020-12',
+              16: 'smpte2084', 17: 'smpte428', 18: 'arib-std-b67'}
+
+# Sample entry header sizes before the child boxes
+_VISUAL_ENTRY_SIZE = 78
+_AUDIO_ENTRY_SIZE = 28
+
+
+class _Unsupported(Exception):
+    """Structure the fast path does not handle; use ffprobe"""
+
+
+def _boxes(data: bytes, start: int = 0, end: int = None):
+    """Yield (type, payload_start, payload_end) for the boxes in data[start:end]"""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                raise _Unsupported('truncated box header')
+            size = struct.unpack_from('>Q', data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            raise _Unsupported('invalid box size')
+        yield box_type, pos + header, pos + size
+        pos += size
+
+def _child(data: bytes, start: int, end: int, box_type: bytes):
+    """Payload bounds of the first child box of the given type"""
+    for child_type, child_start, child_end in _boxes(data, start, end):
+        if child_type == box_type:
+            return child_start, child_end
+    raise _Unsupported(f'missing {box_type!r} box')
+
+def _read_moov(f, file_size: int) -> bytes:
+    """Locate the top-level moov box (before or after mdat) and read it"""
+    pos = 0
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            break
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                break
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - pos
+        if size < header_size:
+            break
+        if box_type == b'moof':
+            raise _Unsupported('fragmented MP4')
+        if box_type == b'moov':
+            if size > _MAX_MOOV_SIZE:
+                raise _Unsupported('moov too large')
+            f.seek(pos + header_size)
+            data = f.read(size - header_size)
+            if len(data) != size - header_size:
+                raise _Unsupported('truncated moov')
+            return data
+        pos += size
+    raise _Unsupported('no moov box')
+
+def _descriptor(data: bytes, pos: int):
+    """Parse an MPEG-4 descriptor header; returns (tag, payload_start, payload_end)"""
+    tag = data[pos]
+    pos += 1
+    size = 0
+    for _ in range(4):
+        byte = data[pos]
+        pos += 1
+        size = (size << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            break
+    return tag, pos, pos + size
+
+def _aac_channels(data: bytes, start: int, end: int) -> int:
+    """Channel count of an AAC-LC esds box, or _Unsupported"""
+    tag, pos, es_end = _descriptor(data, start + 4)  # skip version/flags
+    if tag != 0x03:
+        raise _Unsupported('no ES descriptor')
+    flags = data[pos + 2]
+    pos += 3
+    if flags & 0x80:
+        pos += 2
+    if flags & 0x40:
+        pos += 1 + data[pos]
+    if flags & 0x20:
+        pos += 2
+    tag, pos, _ = _descriptor(data, pos)
+    if tag != 0x04 or data[pos] not in _AAC_OBJECT_TYPES:
+        raise _Unsupported('not AAC')
+    tag, pos, _ = _descriptor(data, pos + 13)
+    if tag != 0x05:
+        raise _Unsupported('no AudioSpecificConfig')
+    object_type = data[pos] >> 3
+    frequency_index = ((data[pos] & 0x07) << 1) | (data[pos + 1] >> 7)
+    if object_type != _AAC_LC or frequency_index == 15:
+        # HE-AAC/escape codes: channel layout differs from the header, ask ffprobe
+        raise _Unsupported('not AAC-LC')
+    channels = _CHANNELS_BY_CONFIG.get((data[pos + 1] >> 3) & 0x0F)
+    if channels is None:
+        raise _Unsupported('unknown channel configuration')
+    return channels
+
+def _video_stream(data: bytes, entry_type: bytes, start: int, end: int) -> dict:
+    """Stream dict for a visual sample entry"""
+    stream = {'codec_type': 'video', 'codec_name': _VIDEO_CODECS[entry_type]}
+    has_colour = False
+    side_data = []
+    for child_type, child_start, child_end in _boxes(data, start + _VISUAL_ENTRY_SIZE, end):
+        if child_type == b'colr' and data[child_start:child_start + 4] in (b'nclx', b'nclc'):
+            primaries, transfer = struct.unpack_from('>HH', data, child_start + 4)
+            if primaries not in _PRIMARIES or transfer not in _TRANSFERS:
+                raise _Unsupported('unmapped colour description')
+            stream['color_primaries'] = _PRIMARIES[primaries]
+            stream['color_transfer'] = _TRANSFERS[transfer]
+            has_colour = True
+        elif child_type == b'mdcv':
+            side_data.append({'side_data_type': 'Mastering display metadata'})
+        elif child_type == b'clli':
+            side_data.append({'side_data_type': 'Content light level metadata'})
+    if not has_colour:
+        # HDR could still be signalled in the bitstream only
+        raise _Unsupported('no colour box')
+    if side_data:
+        stream['side_data_list'] = side_data
+    return stream
+
+def _audio_stream(data: bytes, start: int, end: int) -> dict:
+    """Stream dict for an mp4a sample entry"""
+    if struct.unpack_from('>H', data, start + 8)[0] != 0:
+        raise _Unsupported('QuickTime sound description')
+    esds_start, esds_end = _child(data, start + _AUDIO_ENTRY_SIZE, end, b'esds')
+    return {'codec_type': 'audio', 'codec_name': 'aac', 'channels': _aac_channels(data, esds_start, esds_end)}
+
+def _language(data: bytes, start: int):
+    """Language of an mdhd box as ffprobe reports it (None = no language tag)"""
+    offset = 32 if data[start] == 1 else 20
+    packed = struct.unpack_from('>H', data, start + offset)[0]
+    # Values below 0x400 are Macintosh language codes, 0x7FFF means unspecified
+    if packed == 0x7FFF:
+        return None
+    if packed < 0x400:
+        if packed == 0:
+            return 'eng'
+        raise _Unsupported('Macintosh language code')
+    # Packed ISO-639-2 code: three 5-bit letters offset by 0x60
+    return ''.join(chr(((packed >> shift) & 0x1F) + 0x60) for shift in (10, 5, 0))
+
+def _track_stream(data: bytes, start: int, end: int) -> dict:
+    """Stream dict for one trak box"""
+    mdia_start, mdia_end = _child(data, start, end, b'mdia')
+    mdhd_start, _ = _child(data, mdia_start, mdia_end, b'mdhd')
+    hdlr_start, _ = _child(data, mdia_start, mdia_end, b'hdlr')
+    handler = data[hdlr_start + 8:hdlr_start + 12]
+    minf_start, minf_end = _child(data, mdia_start, mdia_end, b'minf')
+    stbl_start, stbl_end = _child(data, minf_start, minf_end, b'stbl')
+    stsd_start, stsd_end = _child(data, stbl_start, stbl_end, b'stsd')
+    if struct.unpack_from('>I', data, stsd_start + 4)[0] != 1:
+        raise _Unsupported('multiple sample descriptions')
+    entry_type, entry_start, entry_end = next(_boxes(data, stsd_start + 8, stsd_end))
+
+    if handler == b'vide' and entry_type in _VIDEO_CODECS:
+        stream = _video_stream(data, entry_type, entry_start, entry_end)
+    elif handler == b'soun' and entry_type == b'mp4a':
+        stream = _audio_stream(data, entry_start, entry_end)
+    else:
+        raise _Unsupported(f'track {handler!r}/{entry_type!r}')
+    lang = _language(data, mdhd_start)
+    if lang is not None:
+        stream['tags'] = {'language': lang}
+    return stream
+
+def _duration(data: bytes, start: int):
+    """Movie duration in seconds from an mvhd box"""
+    if data[start] == 1:
+        timescale, duration = struct.unpack_from('>IQ', data, start + 20)
+    else:
+        timescale, duration = struct.unpack_from('>II', data, start + 12)
+    return duration / timescale if timescale else None
+
+def probe_mp4(path: Path):
+    """Return (streams, duration) like ffprobe_all() for plain MP4 files, or None if unsure"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, 2)
+            moov = _read_moov(f, f.tell())
+
+        streams = []
+        duration = None
+        for box_type, start, end in _boxes(moov):
+            if box_type == b'mvex':
+                raise _Unsupported('fragmented MP4')
+            if box_type == b'mvhd':
+                duration = _duration(moov, start)
+            elif box_type == b'trak':
+                streams.append(_track_stream(moov, start, end))
+        if not any(s['codec_type'] == 'video' for s in streams):
+            raise _Unsupported('no video track')
+        return streams, duration
+    except (_Unsupported, OSError, IndexError, struct.error, StopIteration):
+        return None
@@ -2,116 +2,144 @@
 FFmpeg command building for video/audio processing
 """
 
+import functools
 from pathlib import Path
 from .language_utils import Action, filter_and_sort_streams
 from .gpu_utils import get_gpu_encoder_params
 
-def build_ffmpeg_cmd(inp: Path, out: Path, mode: Action, crf: int, preset: str, is_hdr: bool = False, 
-                     info: dict = None, keep_languages: list = None, sort_languages: list = None, 
-                     gpu_info: dict = None, use_gpu: bool = False):
+# Static command fragments shared by all modes
+_BASE = ('ffmpeg', '-y', '-hide_banner', '-loglevel', 'warning', '-nostats', '-progress', 'pipe:2')
+_AUDIO_COPY = ('-c:a', 'copy')
+_AUDIO_AAC_STEREO = ('-c:a', 'aac', '-ac', '2', '-b:a', '192k')
+_VIDEO_COPY = ('-c:v', 'copy')
+_FASTSTART = ('-movflags', '+faststart')
+
+# HDR to SDR tone mapping for Apple TV compatibility
+_HDR_SW_VF = 'zscale=t=linear:npl=100,format=gbrpf32le,zscale=p=bt709,tonemap=tonemap=hable:desat=0,zscale=t=bt709:m=bt709:r=tv,format=yuv420p'
+_HDR_BT709_TAGS = ('-color_primaries', 'bt709', '-color_trc', 'bt709', '-colorspace', 'bt709')
+
+# Hardware tone mapping per detected filter: (arguments before -i, video filter).
+# CUDA decodes, tone maps and encodes without leaving the GPU; OpenCL uploads
+# the decoded frames, tone maps on the GPU and hands NV12 to the encoder.
+_HDR_HW = {
+    'tonemap_cuda': (
+        ('-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda'),
+        'tonemap_cuda=tonemap=hable:desat=0:format=nv12'
+    ),
+    'tonemap_opencl': (
+        ('-init_hw_device', 'opencl=ocl', '-filter_hw_device', 'ocl'),
+        'format=p010,hwupload,tonemap_opencl=tonemap=hable:desat=0:t=bt709:m=bt709:p=bt709:format=nv12,'
+        'hwdownload,format=nv12'
+    ),
+}
+
+def _hdr_hw(use_gpu: bool, gpu_info: dict):
+    """Hardware tone mapping entry of _HDR_HW for this run, or None for software"""
+    if use_gpu and gpu_info and gpu_info['available']:
+        return _HDR_HW.get(gpu_info.get('tonemap_filter'))
+    return None
+
+def _hdr_input_args(use_gpu: bool, gpu_info: dict):
+    """Arguments before -i that hardware tone mapping needs"""
+    hw = _hdr_hw(use_gpu, gpu_info)
+    return hw[0] if hw else ()
+
+def _hdr_args(use_gpu: bool, gpu_info: dict):
+    """Tone mapping arguments for HDR sources"""
+    hw = _hdr_hw(use_gpu, gpu_info)
+    if hw:
+        return ('-vf', hw[1]) + _HDR_BT709_TAGS
+    # Software tone mapping (also with VideoToolbox, which then only encodes)
+    return ('-vf', _HDR_SW_VF) + _HDR_BT709_TAGS
+
+def _video_encoder_args(crf: int, preset: str, gpu_info: dict, use_gpu: bool):
+    """Choose video encoder (GPU vs CPU)"""
+    if use_gpu and gpu_info and gpu_info['available']:
+        # GPU encoding
+        return get_gpu_encoder_params(gpu_info, crf, preset)
+    # CPU encoding
+    return _x264_args(crf, preset)
+
+@functools.lru_cache(maxsize=None)
+def _x264_args(crf: int, preset: str):
+    """libx264 parameters, built once per (crf, preset)"""
+    return ('-c:v', 'libx264', '-preset', preset, '-crf', str(crf))
+
+def _build_container_remux(cmd, crf, preset, is_hdr, gpu_info, use_gpu):
+    # Nur Container zu MP4 ändern, alles andere kopieren
+    cmd.extend(_VIDEO_COPY)
+    cmd.extend(_AUDIO_COPY)
+
+def _build_remux_audio(cmd, crf, preset, is_hdr, gpu_info, use_gpu):
+    # Video kopieren, Audio nach AAC Stereo
+    cmd.extend(_VIDEO_COPY)
+    cmd.extend(_AUDIO_AAC_STEREO)
+
+def _build_transcode_video(cmd, crf, preset, is_hdr, gpu_info, use_gpu):
+    # Video transkodieren, Audio kopieren
+    cmd.extend(_AUDIO_COPY)
+    cmd.extend(_video_encoder_args(crf, preset, gpu_info, use_gpu))
+    if is_hdr:
+        cmd.extend(_hdr_args(use_gpu, gpu_info))
+
+def _build_transcode_all(cmd, crf, preset, is_hdr, gpu_info, use_gpu):
+    # Video -> H.264 SDR, Audio -> AAC Stereo
+    cmd.extend(_AUDIO_AAC_STEREO)
+    cmd.extend(_video_encoder_args(crf, preset, gpu_info, use_gpu))
+    if is_hdr:
+        cmd.extend(_hdr_args(use_gpu, gpu_info))
+
+_MODE_BUILDERS = {
+    Action.CONTAINER_REMUX: _build_container_remux,
+    Action.REMUX_AUDIO: _build_remux_audio,
+    Action.TRANCODE_VIDEO: _build_transcode_video,
+    Action.TRANCODE_ALL: _build_transcode_all,
+}
+_TRANSCODE_BUILDERS = (_build_transcode_video, _build_transcode_all)
+
+def uses_hw_tone_mapping(mode: Action, is_hdr: bool, gpu_info: dict = None, use_gpu: bool = False) -> bool:
+    """Whether build_ffmpeg_cmd() tone maps on the GPU for these arguments"""
+    return (is_hdr and _MODE_BUILDERS.get(mode, _build_transcode_all) in _TRANSCODE_BUILDERS
+            and _hdr_hw(use_gpu, gpu_info) is not None)
+
+def build_ffmpeg_cmd(inp: Path, out: Path, mode: Action, crf: int, preset: str, is_hdr: bool = False,
+                     info: dict = None, keep_languages: list = None, sort_languages: list = None,
+                     gpu_info: dict = None, use_gpu: bool = False, threads: int = None):
     """Build FFmpeg command based on processing mode and options"""
-    base = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'warning', '-progress', 'pipe:2', '-i', str(inp)]
-    
     if mode == Action.SKIP:
         return None
 
+    # Unknown modes fall back to a full transcode
+    builder = _MODE_BUILDERS.get(mode, _build_transcode_all)
+
+    cmd = [*_BASE]
+    if is_hdr and builder in _TRANSCODE_BUILDERS:
+        cmd.extend(_hdr_input_args(use_gpu, gpu_info))
+    cmd.extend(('-i', str(inp)))
+
     # Build stream mapping based on language preferences
-    map_args = ['-map', '0:v:0']  # Always map first video stream
-    
+    cmd.extend(('-map', '0:v:0'))  # Always map first video stream
+
     # Handle audio stream mapping
     if info and 'audio_streams' in info:
-        audio_filtered = filter_and_sort_streams(info['audio_streams'], info.get('audio_languages', []), 
+        audio_filtered = filter_and_sort_streams(info['audio_streams'], info.get('audio_languages', []),
                                                 keep_languages, sort_languages)
         if audio_filtered:
             # Map filtered audio streams in preference order
-            for i, (orig_idx, stream, lang) in enumerate(audio_filtered):
-                map_args.extend(['-map', f'0:a:{orig_idx}'])
+            for orig_idx, stream, lang in audio_filtered:
+                cmd.extend(('-map', f'0:a:{orig_idx}'))
         else:
-            map_args.extend(['-map', '0:a:0?'])  # Fallback to first audio if no matches
+            cmd.extend(('-map', '0:a:0?'))  # Fallback to first audio if no matches
     else:
-        map_args.extend(['-map', '0:a:0?'])  # Fallback when no language filtering
-
-    if mode == Action.CONTAINER_REMUX:
-        # Nur Container zu MP4 ändern, alles andere kopieren
-        return base + map_args + [
-            '-c:v', 'copy',
-            '-c:a', 'copy',
-            '-movflags', '+faststart',
-            str(out)
-        ]
-    elif mode == Action.REMUX_AUDIO:
-        # Video kopieren, Audio nach AAC Stereo; MP4 optimieren
-        return base + map_args + [
-            '-c:v', 'copy',
-            '-c:a', 'aac', '-ac', '2', '-b:a', '192k',
-            '-movflags', '+faststart',
-            str(out)
-        ]
-    elif mode == Action.TRANCODE_VIDEO:
-        # Video transkodieren, Audio kopieren
-        cmd = base + map_args + ['-c:a', 'copy']
-        
-        # Choose video encoder (GPU vs CPU)
-        if use_gpu and gpu_info and gpu_info['available']:
-            # GPU encoding
-            gpu_params = get_gpu_encoder_params(gpu_info, crf, preset)
-            cmd.extend(gpu_params)
-        else:
-            # CPU encoding
-            cmd.extend(['-c:v', 'libx264', '-preset', preset, '-crf', str(crf)])
-        
-        # HDR to SDR tone mapping for Apple TV compatibility
-        if is_hdr:
-            # Note: GPU tone mapping may have different filter syntax
-            if use_gpu and gpu_info and gpu_info['platform'] == 'metal':
-                # VideoToolbox tone mapping (simplified)
-                cmd.extend([
-                    '-color_primaries', 'bt709',
-                    '-color_trc', 'bt709',
-                    '-colorspace', 'bt709'
-                ])
-            else:
-                # Software tone mapping
-                cmd.extend([
-                    '-vf', 'zscale=t=linear:npl=100,format=gbrpf32le,zscale=p=bt709,tonemap=tonemap=hable:desat=0,zscale=t=bt709:m=bt709:r=tv,format=yuv420p',
-                    '-color_primaries', 'bt709',
-                    '-color_trc', 'bt709',
-                    '-colorspace', 'bt709'
-                ])
-        
-        cmd.extend(['-movflags', '+faststart', str(out)])
-        return cmd
-    else:
-        # Action.TRANCODE_ALL: Video -> H.264 SDR, Audio -> AAC Stereo
-        cmd = base + map_args + ['-c:a', 'aac', '-ac', '2', '-b:a', '192k']
-        
-        # Choose video encoder (GPU vs CPU)
-        if use_gpu and gpu_info and gpu_info['available']:
-            # GPU encoding
-            gpu_params = get_gpu_encoder_params(gpu_info, crf, preset)
-            cmd.extend(gpu_params)
-        else:
-            # CPU encoding
-            cmd.extend(['-c:v', 'libx264', '-preset', preset, '-crf', str(crf)])
-        
-        # HDR to SDR tone mapping for Apple TV compatibility
-        if is_hdr:
-            # Note: GPU tone mapping may have different filter syntax
-            if use_gpu and gpu_info and gpu_info['platform'] == 'metal':
-                # VideoToolbox tone mapping (simplified)
-                cmd.extend([
-                    '-color_primaries', 'bt709',
-                    '-color_trc', 'bt709',
-                    '-colorspace', 'bt709'
-                ])
-            else:
-                # Software tone mapping
-                cmd.extend([
-                    '-vf', 'zscale=t=linear:npl=100,format=gbrpf32le,zscale=p=bt709,tonemap=tonemap=hable:desat=0,zscale=t=bt709:m=bt709:r=tv,format=yuv420p',
-                    '-color_primaries', 'bt709',
-                    '-color_trc', 'bt709',
-                    '-colorspace', 'bt709'
-                ])
-        
-        cmd.extend(['-movflags', '+faststart', str(out)])
-        return cmd
\ No newline at end of file
+        cmd.extend(('-map', '0:a:0?'))  # Fallback when no language filtering
+
+    builder(cmd, crf, preset, is_hdr, gpu_info, use_gpu)
+
+    # Cap encoder threads when several ffmpeg processes share the CPU
+    if threads:
+        cmd.extend(('-threads', str(threads)))
+
+    # MP4 optimieren
+    cmd.extend(_FASTSTART)
+    cmd.append(str(out))
+    return cmd
@@ -2,8 +2,13 @@
 FFmpeg command execution with progress monitoring
 """
 
+import copy
+import functools
 import json
+import os
+import queue
 import re
+import selectors
 import signal
 import subprocess
 import sys
@@ -12,9 +17,42 @@ import time
 from datetime import timedelta
 from pathlib import Path
 
-# Global variables for signal handling
-current_ffmpeg_process = None
+# Optional faster JSON parser for ffprobe output
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Legacy stderr stats format: time=HH:MM:SS.cc
+_TIME_RE = re.compile(rb'time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})')
+_US_TO_SECONDS = 1 / 1_000_000
+
+# Bulk pipe reads need select() on pipes, which Windows does not support
+_USE_SELECTOR = os.name != 'nt'
+_READ_CHUNK_SIZE = 65536
+# Stats lines end in '\r' when a caller leaves out -nostats; split on both
+_LINE_BREAK_RE = re.compile(rb'\r\n?|\n')
+
+# Larger progress pipe so ffmpeg never blocks on progress output while we redraw
+# (Linux only; F_SETPIPE_SZ is capped by /proc/sys/fs/pipe-max-size, 1 MiB by default)
+_PIPE_SIZE = 1 << 20
+try:
+    import fcntl
+    _F_SETPIPE_SZ = getattr(fcntl, 'F_SETPIPE_SZ', 1031) if sys.platform.startswith('linux') else None
+except ImportError:
+    _F_SETPIPE_SZ = None
+
+# Global state for signal handling: every running ffmpeg process is registered
+# so an interrupt can stop all of them. Reentrant because the signal handler runs
+# on the main thread, possibly while that thread holds the lock itself.
+_active_procs = set()
+_active_procs_lock = threading.RLock()
 interrupted = False
+# Self-pipe made readable by an interrupt; every pipe-draining selector watches it
+# instead of polling the flag (POSIX only, created on first use per process so
+# forked pool workers never share it)
+_interrupt_pipe = None  # (pid, read_fd, write_fd)
 
 class ProgressMonitor:
     """Real-time ffmpeg progress monitor with progress bar"""
@@ -26,64 +64,86 @@ class ProgressMonitor:
         self.bitrate = ""
         self.speed = ""
         self.progress_percent = 0
-        self.start_time = time.time()
-        self.last_update = time.time()
+        # Percent per second of output; one multiplication per progress event
+        self._percent_per_second = 100.0 / duration_seconds if duration_seconds and duration_seconds > 0 else 0.0
+        self.start_time = time.monotonic()
         self.running = False
+        self.renderer = None
         
     def parse_progress_line(self, line):
-        """Parse ffmpeg progress output line"""
+        """Parse ffmpeg progress output line (bytes from the stderr pipe)"""
+        if isinstance(line, str):
+            line = line.encode('utf-8', 'replace')
         line = line.strip()
         if not line:
             return False
-            
-        # Parse out_time_us (microseconds) from progress pipe format
-        if line.startswith('out_time_us='):
-            try:
-                microseconds = int(line.split('=')[1])
-                self.current_time = microseconds / 1_000_000  # Convert to seconds
-                
-                if self.duration and self.duration > 0:
-                    self.progress_percent = min(100, (self.current_time / self.duration) * 100)
-                return True
-            except (ValueError, IndexError):
-                pass
         
-        # Fallback: Parse time=HH:MM:SS.sss from stderr format
-        time_match = re.search(r'time=(\d{2}):(\d{2}):(\d{2})\.(\d{2})', line)
-        if time_match:
-            hours = int(time_match.group(1))
-            minutes = int(time_match.group(2))
-            seconds = int(time_match.group(3))
-            centiseconds = int(time_match.group(4))
-            self.current_time = hours * 3600 + minutes * 60 + seconds + centiseconds / 100
-            
-            if self.duration and self.duration > 0:
-                self.progress_percent = min(100, (self.current_time / self.duration) * 100)
-            return True
+        # -progress pipe:2 emits plain key=value lines; dispatch on the key
+        key, sep, value = line.partition(b'=')
+        if sep:
+            handler = self._handlers.get(key)
+            if handler is not None:
+                return handler(self, value)
+        
+        # Fallback: Parse time=HH:MM:SS.cc from stderr stats format
+        if b'time=' in line:
+            time_match = _TIME_RE.search(line)
+            if time_match:
+                hours, minutes, seconds, centiseconds = map(int, time_match.groups())
+                self._set_current_time(hours * 3600 + minutes * 60 + seconds + centiseconds / 100)
+                return True
         
-        # Parse fps=XX.X
-        fps_match = re.search(r'fps=\s*(\d+\.?\d*)', line)
-        if fps_match:
-            self.fps = float(fps_match.group(1))
-            
-        # Parse bitrate=XXXkbits/s
-        bitrate_match = re.search(r'bitrate=\s*([0-9.]+[kmg]?bits/s)', line)
-        if bitrate_match:
-            self.bitrate = bitrate_match.group(1)
-            
-        # Parse speed=X.XXx
-        speed_match = re.search(r'speed=\s*([0-9.]+x)', line)
-        if speed_match:
-            self.speed = speed_match.group(1)
-            
         return False
     
+    def _set_current_time(self, seconds):
+        """Store current position and update percentage"""
+        self.current_time = seconds
+        if self._percent_per_second:
+            percent = seconds * self._percent_per_second
+            self.progress_percent = percent if percent < 100.0 else 100.0
+    
+    def _parse_out_time_us(self, value):
+        """Handle out_time_us=<microseconds>"""
+        try:
+            self._set_current_time(int(value) * _US_TO_SECONDS)
+        except ValueError:
+            return False
+        return True
+    
+    def _parse_fps(self, value):
+        """Handle fps=<float>"""
+        try:
+            self.fps = float(value)
+        except ValueError:
+            pass
+        return False
+    
+    def _parse_bitrate(self, value):
+        """Handle bitrate=<value>kbits/s (ffmpeg pads the value with spaces)"""
+        value = value.strip()
+        if value.endswith(b'bits/s'):
+            self.bitrate = value.decode('ascii', 'replace')
+        return False
+    
+    def _parse_speed(self, value):
+        """Handle speed=<value>x"""
+        if value.endswith(b'x'):
+            self.speed = value.strip().decode('ascii', 'replace')
+        return False
+    
+    _handlers = {
+        b'out_time_us': _parse_out_time_us,
+        b'fps': _parse_fps,
+        b'bitrate': _parse_bitrate,
+        b'speed': _parse_speed,
+    }
+    
     def get_eta_string(self):
         """Calculate and format estimated time remaining"""
         if not self.duration or self.current_time <= 0:
             return "??:??:??"
             
-        elapsed = time.time() - self.start_time
+        elapsed = time.monotonic() - self.start_time
         if elapsed <= 0:
             return "??:??:??"
             
@@ -105,9 +165,7 @@ class ProgressMonitor:
     
     def draw_progress_bar(self, width=40):
         """Draw a text progress bar"""
-        filled = int(width * self.progress_percent / 100)
-        bar = '█' * filled + '░' * (width - filled)
-        return f"[{bar}]"
+        return _progress_bar(int(width * self.progress_percent / 100), width)
     
     def get_progress_line(self):
         """Get formatted progress line"""
@@ -126,51 +184,276 @@ class ProgressMonitor:
         
         return f"\r{bar} {self.progress_percent:5.1f}% | {time_info} | ETA: {eta} | {speed_info} | {fps_info}"
     
+    def snapshot(self):
+        """Copy of the current progress values for rendering in another thread"""
+        snap = copy.copy(self)
+        snap.renderer = None
+        return snap
+    
     def update_display(self):
-        """Update progress display"""
-        now = time.time()
-        if now - self.last_update >= 0.5:  # Update every 500ms
-            print(self.get_progress_line(), end='', flush=True)
-            self.last_update = now
+        """Hand the current progress to the renderer thread (throttled there)"""
+        if self.renderer is not None:
+            # Never block the pipe reader
+            self.renderer.submit(self.snapshot())
 
-def signal_handler(signum, frame):
-    """Handle Ctrl+C and other signals gracefully"""
-    global current_ffmpeg_process, interrupted
+@functools.lru_cache(maxsize=128)
+def _progress_bar(filled, width):
+    """Bar string per fill level; a run only ever draws width + 1 of them"""
+    return f"[{'█' * filled}{'░' * (width - filled)}]"
+
+class ProgressRenderer:
+    """Background thread that redraws the latest progress snapshot at a fixed rate"""
     
-    print(f"\n\nUnterbrechung erkannt (Signal {signum})")
-    interrupted = True
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self._latest = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._render_loop, name='progress-renderer', daemon=True)
+        try:
+            self._fd = sys.stdout.fileno()
+        except (AttributeError, OSError, ValueError):
+            # stdout replaced (e.g. captured); fall back to print()
+            self._fd = None
+    
+    def start(self):
+        sys.stdout.flush()
+        self._thread.start()
+        return self
     
-    if current_ffmpeg_process and current_ffmpeg_process.poll() is None:
-        print("Beende ffmpeg-Prozess graceful...")
+    def submit(self, snapshot):
+        """Replace the pending snapshot with a newer one"""
         try:
-            # Send SIGTERM first (graceful termination)
-            current_ffmpeg_process.terminate()
-            
-            # Wait up to 5 seconds for graceful termination
+            self._latest.put_nowait(snapshot)
+        except queue.Full:
+            try:
+                self._latest.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._latest.put_nowait(snapshot)
+            except queue.Full:
+                pass
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+    
+    def _render_loop(self):
+        while not self._stop.is_set():
             try:
-                current_ffmpeg_process.wait(timeout=5)
-                print("FFmpeg-Prozess erfolgreich beendet")
-            except subprocess.TimeoutExpired:
-                # Force kill if it doesn't terminate gracefully
-                print("FFmpeg antwortet nicht, beende forciert...")
-                current_ffmpeg_process.kill()
-                current_ffmpeg_process.wait()
-                print("FFmpeg-Prozess forciert beendet")
-        except Exception as e:
-            print(f"Fehler beim Beenden des FFmpeg-Prozesses: {e}")
-    
-    print("Programm beendet")
+                snapshot = self._latest.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            line = snapshot.get_progress_line()
+            if self._fd is not None:
+                os.write(self._fd, line.encode('utf-8', 'replace'))
+            else:
+                print(line, end='', flush=True)
+            self._stop.wait(self.interval)
+
+def _register_process(p):
+    with _active_procs_lock:
+        _active_procs.add(p)
+
+def _unregister_process(p):
+    with _active_procs_lock:
+        _active_procs.discard(p)
+
+def _interrupt_fd():
+    """Read end of the interrupt self-pipe; it is never read, so it stays readable for all selectors"""
+    global _interrupt_pipe
+    with _active_procs_lock:
+        if _interrupt_pipe is None or _interrupt_pipe[0] != os.getpid():
+            read_fd, write_fd = os.pipe()
+            os.set_blocking(write_fd, False)
+            _interrupt_pipe = (os.getpid(), read_fd, write_fd)
+            if interrupted:
+                _wake_pipe_drains()
+    return _interrupt_pipe[1]
+
+def _wake_pipe_drains():
+    """Make this process's interrupt self-pipe readable"""
+    pipe = _interrupt_pipe
+    if pipe is not None and pipe[0] == os.getpid():
+        try:
+            os.write(pipe[2], b'\0')
+        except OSError:
+            pass
+
+def _mark_interrupted():
+    """Set the interrupted flag and wake up all running pipe drains"""
+    global interrupted
+    interrupted = True
+    _wake_pipe_drains()
+
+def stop_active_runs():
+    """Flag the interrupt and silently terminate this process's ffmpeg runs, without exiting (pool workers)"""
+    _mark_interrupted()
+    terminate_active_processes(report=False)
+
+def _send_signal(p, sig):
+    """Signal a child; on POSIX the whole process group it leads"""
+    try:
+        if os.name == 'nt':
+            if sig == signal.SIGTERM:
+                p.terminate()
+            else:
+                p.kill()
+        else:
+            os.killpg(p.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+def _notify(text):
+    """Write a status line unbuffered to stderr"""
+    # print() from the signal handler can land inside a print() it interrupted
+    # (reentrant BufferedWriter error) and mix into the progress bar redraws
+    try:
+        os.write(2, (text + '\n').encode('utf-8', 'replace'))
+    except OSError:
+        pass
+
+def terminate_active_processes(timeout=5, report=True):
+    """Terminate all registered ffmpeg processes, escalating to SIGKILL after timeout
+    
+    report=False keeps it silent (pool workers; the parent reports the interrupt).
+    """
+    with _active_procs_lock:
+        running = [p for p in _active_procs if p.poll() is None]
+    if not running:
+        return
+    
+    notify = _notify if report else (lambda text: None)
+    notify(f"Beende {len(running)} ffmpeg-Prozess(e) graceful...")
+    # Send SIGTERM first (graceful termination)
+    for p in running:
+        _send_signal(p, signal.SIGTERM)
+    
+    # Wait up to timeout seconds in total for graceful termination
+    deadline = time.monotonic() + timeout
+    for p in running:
+        try:
+            p.wait(timeout=max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            # Force kill if it doesn't terminate gracefully
+            notify("FFmpeg antwortet nicht, beende forciert...")
+            _send_signal(p, getattr(signal, 'SIGKILL', signal.SIGTERM))
+            p.wait()
+    notify("FFmpeg-Prozesse beendet")
+
+def signal_handler(signum, frame):
+    """Handle Ctrl+C and other signals gracefully"""
+    _notify(f"\n\nUnterbrechung erkannt (Signal {signum})")
+    _mark_interrupted()
+    
+    try:
+        terminate_active_processes()
+    except Exception as e:
+        _notify(f"Fehler beim Beenden des FFmpeg-Prozesses: {e}")
+    
+    # Persist cache updates made so far (imported lazily to avoid a cycle)
+    try:
+        from .cache_manager import flush_all_caches
+        flush_all_caches()
+    except Exception as e:
+        _notify(f"Fehler beim Speichern der Cache-Datei: {e}")
+    
+    _notify("Programm beendet")
     sys.exit(1)
 
+def worker_signal_handler(signum, frame):
+    """SIGTERM handler for pool workers: stop the own ffmpeg run; the parent writes the cache"""
+    stop_active_runs()
+
 def setup_signal_handlers():
     """Set up signal handlers for graceful interruption"""
+    # signal.signal() may only be called from the main thread
+    if threading.current_thread() is not threading.main_thread():
+        return
     signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
     signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
 
+def _enlarge_pipe(fd):
+    """Grow a pipe's kernel buffer where supported; Windows keeps the default"""
+    if _F_SETPIPE_SZ is None:
+        return
+    try:
+        fcntl.fcntl(fd, _F_SETPIPE_SZ, _PIPE_SIZE)
+    except OSError:
+        # Over the per-user pipe quota; the default size still works
+        pass
+
+def _drain_pipes(p, stdout_chunks, stderr_chunks, on_progress_line, progress_fd=None):
+    """Read stdout/stderr (and the progress pipe) in bulk from non-blocking pipes until all are closed.
+    
+    Complete progress lines are handed to on_progress_line; they come from
+    progress_fd if given, otherwise from stderr. Raw stdout/stderr chunks are
+    collected for the caller.
+    """
+    selector = selectors.DefaultSelector()
+    sources = [(p.stdout.fileno(), stdout_chunks, False), (p.stderr.fileno(), stderr_chunks, progress_fd is None)]
+    if progress_fd is not None:
+        sources.append((progress_fd, None, True))
+    for fd, chunks, has_lines in sources:
+        os.set_blocking(fd, False)
+        selector.register(fd, selectors.EVENT_READ, (chunks, bytearray() if has_lines else None))
+    # An interrupt shows up as a readable event, so select() can block without a timeout
+    selector.register(_interrupt_fd(), selectors.EVENT_READ, None)
+    
+    try:
+        while len(selector.get_map()) > 1:
+            if interrupted:
+                print(f"\nProzess wurde unterbrochen")
+                break
+            
+            for key, _ in selector.select():
+                if key.data is None:
+                    # Interrupt self-pipe; the flag check above ends the loop
+                    break
+                try:
+                    data = os.read(key.fd, _READ_CHUNK_SIZE)
+                except BlockingIOError:
+                    continue
+                chunks, pending = key.data
+                if not data:
+                    selector.unregister(key.fd)
+                    if pending:
+                        on_progress_line(bytes(pending))
+                    continue
+                
+                if chunks is not None:
+                    chunks.append(data)
+                if pending is not None:
+                    pending += data
+                    end = max(pending.rfind(b'\n'), pending.rfind(b'\r'))
+                    if end >= 0:
+                        for line in _LINE_BREAK_RE.split(bytes(pending[:end])):
+                            on_progress_line(line)
+                        del pending[:end + 1]
+    finally:
+        selector.close()
+
+def _progress_pipe(cmd_str):
+    """Move '-progress pipe:2' to a dedicated pipe; returns (read_fd, write_fd) or (None, None).
+    
+    Keeps stderr free of progress records, so error output stays readable and
+    progress is never parsed out of ffmpeg's log lines.
+    """
+    if not _USE_SELECTOR:
+        return None, None
+    try:
+        idx = cmd_str.index('-progress')
+    except ValueError:
+        return None, None
+    if cmd_str[idx + 1:idx + 2] != ['pipe:2']:
+        return None, None
+    read_fd, write_fd = os.pipe()
+    cmd_str[idx + 1] = f'pipe:{write_fd}'
+    return read_fd, write_fd
+
 def run(cmd, show_progress=False, duration=None, progress_callback=None):
     """Execute command with optional progress monitoring"""
-    global current_ffmpeg_process, interrupted
-    
     # Check if we were interrupted before starting
     if interrupted:
         return 130, "", "Process interrupted"
@@ -180,93 +463,170 @@ def run(cmd, show_progress=False, duration=None, progress_callback=None):
     
     if not show_progress:
         # Original behavior for non-ffmpeg commands
-        p = subprocess.run(cmd_str, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        return p.returncode, p.stdout, p.stderr
+        code, out, err = run_bytes(cmd_str)
+        return code, out.decode('utf-8', 'replace'), err.decode('utf-8', 'replace')
     
     # Progress monitoring for ffmpeg
     progress = ProgressMonitor(duration)
     
     # Start ffmpeg process with real-time stderr capture
-    p = subprocess.Popen(cmd_str, stdout=subprocess.PIPE, stderr=subprocess.PIPE, 
-                        text=True, universal_newlines=True)
+    # Own process group on POSIX so a terminate reaches ffmpeg's children too;
+    # it also keeps terminal Ctrl+C away from ffmpeg, our handler stops it instead
+    progress_fd, progress_write_fd = _progress_pipe(cmd_str)
+    try:
+        # A large read buffer lets the readline() fallback on Windows take everything
+        # available in one read instead of one small read per progress line
+        p = subprocess.Popen(cmd_str, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             bufsize=_PIPE_SIZE, start_new_session=(os.name != 'nt'),
+                             pass_fds=(progress_write_fd,) if progress_write_fd is not None else ())
+    except BaseException:
+        if progress_fd is not None:
+            os.close(progress_fd)
+        raise
+    finally:
+        # The child holds its own copy of the write end
+        if progress_write_fd is not None:
+            os.close(progress_write_fd)
+    if progress_fd is not None:
+        _enlarge_pipe(progress_fd)
+    else:
+        _enlarge_pipe(p.stderr.fileno())
     
-    # Track the current ffmpeg process globally for signal handling
-    current_ffmpeg_process = p
+    # Track the ffmpeg process globally for signal handling
+    _register_process(p)
     
     stdout_lines = []
     stderr_lines = []
     
+    # Without a Rich callback the text progress line is drawn by a renderer thread,
+    # but only on the real stdout: a redirected one (output recorded in a pool
+    # worker) would replay every redraw
+    text_progress = not (progress_callback and duration) and sys.stdout is sys.__stdout__
+    if text_progress:
+        progress.renderer = ProgressRenderer().start()
+    
+    def handle_progress_line(line):
+        # Parse progress and update display
+        if progress.parse_progress_line(line):
+            # Call Rich progress callback if provided
+            if progress_callback and duration:
+                progress_callback(progress.current_time)
+            elif text_progress:
+                # Fallback to traditional progress display
+                progress.update_display()
+    
     try:
-        # Read stderr in real-time for progress updates
-        while True:
-            # Check for interruption
+        if _USE_SELECTOR:
+            _drain_pipes(p, stdout_lines, stderr_lines, handle_progress_line, progress_fd)
             if interrupted:
-                print(f"\nProzess wurde unterbrochen")
-                break
+                # Started after the interrupt collected the running processes
+                _send_signal(p, signal.SIGTERM)
+            p.wait()
+        else:
+            # Read stderr in real-time for progress updates
+            while True:
+                # Check for interruption
+                if interrupted:
+                    print(f"\nProzess wurde unterbrochen")
+                    _send_signal(p, signal.SIGTERM)
+                    break
+                    
+                stderr_line = p.stderr.readline()
+                if stderr_line == b'' and p.poll() is not None:
+                    break
                 
-            stderr_line = p.stderr.readline()
-            if stderr_line == '' and p.poll() is not None:
-                break
+                if stderr_line:
+                    stderr_lines.append(stderr_line)
+                    handle_progress_line(stderr_line)
             
-            if stderr_line:
-                stderr_lines.append(stderr_line)
-                
-                # Parse progress and update display
-                if progress.parse_progress_line(stderr_line):
-                    # Call Rich progress callback if provided
-                    if progress_callback and duration:
-                        progress_callback(progress.current_time)
-                    else:
-                        # Fallback to traditional progress display
-                        progress.update_display()
-        
-        # Get remaining output
-        stdout, stderr_remaining = p.communicate()
-        if stdout:
-            stdout_lines.append(stdout)
-        if stderr_remaining:
-            stderr_lines.append(stderr_remaining)
+            # Get remaining output
+            stdout, stderr_remaining = p.communicate()
+            if stdout:
+                stdout_lines.append(stdout)
+            if stderr_remaining:
+                stderr_lines.append(stderr_remaining)
         
     except KeyboardInterrupt:
         # This shouldn't happen as we handle it globally, but just in case
         print(f"\nKeyboardInterrupt im Prozess")
-        interrupted = True
+        _mark_interrupted()
     
     finally:
-        # Clear the global process reference
-        current_ffmpeg_process = None
+        # Remove the process from the registry
+        _unregister_process(p)
+        if progress_fd is not None:
+            os.close(progress_fd)
+        if progress.renderer is not None:
+            progress.renderer.stop()
+            progress.renderer = None
     
-    # Final progress update (only if not interrupted)
-    if show_progress and not interrupted:
+    # Final progress update (only if not interrupted) below the text progress line
+    if text_progress and not interrupted:
         progress.progress_percent = 100
         print(progress.get_progress_line())
         print()  # New line after progress bar
-    elif interrupted:
+    elif text_progress:
         print()  # New line after interruption
     
+    # Decode collected output once
+    stdout_text = b''.join(stdout_lines).decode('utf-8', 'replace')
+    stderr_text = b''.join(stderr_lines).decode('utf-8', 'replace')
+    
     # Return appropriate exit code
     if interrupted:
-        return 130, '\n'.join(stdout_lines), '\n'.join(stderr_lines)  # 130 = interrupted by Ctrl+C
+        return 130, stdout_text, stderr_text  # 130 = interrupted by Ctrl+C
     
-    return p.returncode, '\n'.join(stdout_lines), '\n'.join(stderr_lines)
+    return p.returncode, stdout_text, stderr_text
 
 def run_simple(cmd):
     """Simple run function for non-ffmpeg commands (backward compatibility)"""
     return run(cmd, show_progress=False)
 
-def ffprobe_streams(path: Path):
-    """Get stream information from media file"""
+def run_bytes(cmd):
+    """Run a command and return (returncode, stdout, stderr) as undecoded bytes"""
+    p = subprocess.run([str(c) for c in cmd], stdin=subprocess.DEVNULL,
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return p.returncode, p.stdout, p.stderr
+
+# Only the fields discover_media() and the HDR checks read
+_STREAM_ENTRIES = 'stream=codec_type,codec_name,channels,color_space,color_transfer,color_primaries,side_data_list:stream_tags=language'
+
+def _ffprobe_json(path: Path, show_entries: str = None):
+    """Run ffprobe with JSON output and return the parsed document (full stream/format dump without show_entries)"""
+    if show_entries:
+        selection = ['-show_entries', show_entries]
+    else:
+        selection = ['-show_streams', '-show_format']
     cmd = [
         'ffprobe', '-v', 'error',
-        '-show_entries', 'stream=index,codec_type,codec_name,channels,color_space,color_transfer,color_primaries,side_data_list:stream_tags=language,title',
+        *selection,
         '-of', 'json',
         str(path)
     ]
-    code, out, err = run_simple(cmd)
+    code, out, err = run_bytes(cmd)
     if code != 0:
-        raise RuntimeError(f'ffprobe failed for {path}: {err}')
-    data = json.loads(out or '{}')
-    return data.get('streams', [])
+        raise RuntimeError(f'ffprobe failed for {path}: {err.decode("utf-8", "replace")}')
+    return _json_loads(out) if out else {}
+
+def ffprobe_streams(path: Path):
+    """Get stream information from media file"""
+    streams = _ffprobe_json(path, _STREAM_ENTRIES).get('streams', [])
+    return streams or _ffprobe_json(path).get('streams', [])
+
+def ffprobe_all(path: Path):
+    """Get stream information and duration from a single ffprobe call.
+    
+    Returns (streams, duration_seconds); duration is None if unknown.
+    """
+    data = _ffprobe_json(path, _STREAM_ENTRIES + ':format=duration')
+    if not data.get('streams'):
+        # Some fragmented/streaming inputs only report streams with the full dump
+        data = _ffprobe_json(path)
+    try:
+        duration = float(data.get('format', {}).get('duration'))
+    except (TypeError, ValueError):
+        duration = None
+    return data.get('streams', []), duration
 
 def get_duration(path: Path):
     """Get duration of media file in seconds"""
@@ -276,7 +636,7 @@ def get_duration(path: Path):
         '-of', 'csv=p=0',
         str(path)
     ]
-    code, out, err = run_simple(cmd)
+    code, out, err = run_bytes(cmd)
     if code != 0:
         return None
     try:
@@ -2,12 +2,70 @@
 File handling utilities and path operations
 """
 
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from .language_utils import Action
 
 # Video file extensions
-VIDEO_EXTS = {'.mkv', '.mp4', '.m4v', '.mov', '.avi', '.wmv', '.flv', '.ts', '.m2ts', '.webm'}
+VIDEO_EXTS = frozenset({'.mkv', '.mp4', '.m4v', '.mov', '.avi', '.wmv', '.flv', '.ts', '.m2ts', '.webm'})
+
+# Suffix tuple for str.endswith(); only the tail of a name needs lowercasing
+_VIDEO_SUFFIXES = tuple(VIDEO_EXTS)
+_MAX_SUFFIX_LEN = max(len(ext) for ext in VIDEO_EXTS)
+
+def is_video_filename(name: str) -> bool:
+    """Check a file name against VIDEO_EXTS (case-insensitive)"""
+    return name[-_MAX_SUFFIX_LEN:].lower().endswith(_VIDEO_SUFFIXES)
+
+# NAS/OS metadata and recycle-bin directories; hidden (dot) directories are skipped too
+_SKIP_DIRS = frozenset({'@eaDir', '#recycle', '#snapshot', '@Recycle', '$RECYCLE.BIN', 'System Volume Information'})
+
+def iter_video_files(root: Path):
+    """Yield all video files below root as Paths (one os.scandir pass per directory)"""
+    stack = [root]
+    while stack:
+        subdirs = []
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        name = entry.name
+                        if name[0] != '.' and name not in _SKIP_DIRS:
+                            subdirs.append(entry.path)
+                    elif is_video_filename(entry.name) and entry.is_file(follow_symlinks=False):
+                        yield Path(entry.path)
+        except (PermissionError, FileNotFoundError):
+            # Unreadable or vanished directories are skipped like rglob does
+            continue
+        # Reversed so subdirectories are visited in directory order
+        stack.extend(reversed(subdirs))
+
+# stat() round-trips on network shares are overlapped in chunks of this size
+_EXISTS_CHUNK_SIZE = 256
+_EXISTS_WORKERS = 32
+
+def _stat_chunk(paths):
+    results = []
+    for p in paths:
+        try:
+            results.append((p, os.stat(p)))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return results
+
+def stat_existing(paths):
+    """Return (path, stat_result) for the paths that exist, in order; stat calls run concurrently for long lists"""
+    if len(paths) <= _EXISTS_CHUNK_SIZE:
+        return _stat_chunk(paths)
+    chunks = [paths[i:i + _EXISTS_CHUNK_SIZE] for i in range(0, len(paths), _EXISTS_CHUNK_SIZE)]
+    with ThreadPoolExecutor(max_workers=min(_EXISTS_WORKERS, len(chunks))) as executor:
+        return [item for chunk in executor.map(_stat_chunk, chunks) for item in chunk]
+
+def filter_existing(paths):
+    """Return the paths that exist, in order"""
+    return [p for p, _ in stat_existing(paths)]
 
 def format_file_size(size_bytes):
     """Convert bytes to human readable format"""
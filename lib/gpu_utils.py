@@ -2,24 +2,131 @@
 GPU acceleration detection and utilities
 """
 
+import functools
+import json
+import os
+import platform
+import shutil
 import sys
 import subprocess
+import time
+from pathlib import Path
 
-def detect_gpu_acceleration():
-    """Detect available GPU acceleration options"""
-    gpu_info = {
-        'available': False,
-        'encoder': None,
-        'decoder': None,
-        'platform': None
-    }
+# Encoder detection spawns `ffmpeg -encoders`; remember the result for a while
+_GPU_CACHE_TTL = 3600.0
+_gpu_cache = None  # (timestamp, gpu_info)
+
+# The answer only changes with the machine or the ffmpeg build, so it is also
+# stored on disk and reused by later runs for up to a week
+_GPU_CACHE_MAX_AGE = 7 * 24 * 3600
+
+_NO_GPU = {
+    'available': False,
+    'encoder': None,
+    'decoder': None,
+    'platform': None,
+    'tonemap_filter': None
+}
+
+# Hardware tone mapping filters per platform, in order of preference.
+# tonemap_cuda keeps frames on the GPU (jellyfin-ffmpeg builds); tonemap_opencl
+# is in upstream ffmpeg and works on NVIDIA and Intel. VideoToolbox has none
+# usable here, so Metal tone maps in software and only encodes on the GPU.
+_TONEMAP_FILTERS = {
+    'nvidia': ('tonemap_cuda', 'tonemap_opencl'),
+    'intel': ('tonemap_opencl',),
+    'amd': ('tonemap_opencl',),
+}
+
+# Test run per filter: a filter listed by `ffmpeg -filters` may still lack a
+# usable device (no OpenCL ICD, no CUDA driver), so one generated frame is tone
+# mapped on the device before the filter is used for real files
+_TONEMAP_TESTS = {
+    'tonemap_cuda': (('-init_hw_device', 'cuda=cu', '-filter_hw_device', 'cu'),
+                     'format=p010,hwupload,tonemap_cuda=tonemap=hable:format=nv12,hwdownload,format=nv12'),
+    'tonemap_opencl': (('-init_hw_device', 'opencl=ocl', '-filter_hw_device', 'ocl'),
+                       'format=p010,hwupload,tonemap_opencl=tonemap=hable:format=nv12,hwdownload,format=nv12'),
+}
+_TONEMAP_TEST_TIMEOUT = 30
+
+# Bumped when detection changes, so results stored by older versions are not reused
+_DETECTION_VERSION = 2
+
+def detect_gpu_acceleration(force_refresh: bool = False):
+    """Detect available GPU acceleration options (cached in memory and on disk)"""
+    global _gpu_cache
+    
+    now = time.monotonic()
+    if not force_refresh and _gpu_cache is not None and now - _gpu_cache[0] < _GPU_CACHE_TTL:
+        return dict(_gpu_cache[1])
+    
+    key = _gpu_cache_key()
+    gpu_info = None if force_refresh else _load_stored_gpu_info(key)
+    if gpu_info is None:
+        gpu_info = _probe_gpu_acceleration()
+        if gpu_info is None:
+            # Detection failed; do not remember that across runs
+            gpu_info = dict(_NO_GPU)
+        else:
+            _store_gpu_info(key, gpu_info)
+    _gpu_cache = (now, gpu_info)
+    return dict(gpu_info)
+
+def _gpu_cache_file():
+    """Stored detection result next to the ffprobe cache"""
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'plex-directplay-convert' / 'gpu.json'
+
+def _gpu_cache_key():
+    """Machine and ffmpeg binary a stored detection result belongs to"""
+    ffmpeg = shutil.which('ffmpeg')
+    try:
+        ffmpeg_mtime = os.stat(ffmpeg).st_mtime_ns if ffmpeg else None
+    except OSError:
+        ffmpeg_mtime = None
+    return [_DETECTION_VERSION, platform.node(), platform.platform(), ffmpeg, ffmpeg_mtime]
+
+def _load_stored_gpu_info(key):
+    """Stored detection result for key, or None if missing, stale or for another setup"""
+    path = _gpu_cache_file()
+    try:
+        if time.time() - path.stat().st_mtime > _GPU_CACHE_MAX_AGE:
+            return None
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get('key') != key:
+        return None
+    gpu_info = data.get('gpu_info')
+    if not isinstance(gpu_info, dict) or gpu_info.keys() != _NO_GPU.keys():
+        return None
+    return gpu_info
+
+def _store_gpu_info(key, gpu_info):
+    """Write the detection result for later runs; failures only cost a re-detection"""
+    path = _gpu_cache_file()
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path.write_text(json.dumps({'key': key, 'gpu_info': gpu_info}), encoding='utf-8')
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+def _probe_gpu_acceleration():
+    """Query ffmpeg for available hardware encoders (None if ffmpeg could not be asked)"""
+    gpu_info = dict(_NO_GPU)
     
     try:
         # Check ffmpeg encoders
-        p = subprocess.run(['ffmpeg', '-encoders'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        p = subprocess.run(['ffmpeg', '-encoders'], stdin=subprocess.DEVNULL,
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         if p.returncode != 0:
-            return gpu_info
-        out = p.stdout
+            return None
+        out = p.stdout.decode('utf-8', 'replace')
             
         encoders_output = out.lower()
         
@@ -39,7 +146,8 @@ def detect_gpu_acceleration():
                 'available': True,
                 'encoder': 'h264_nvenc',
                 'decoder': 'h264_cuvid',  # Hardware decoder if available
-                'platform': 'nvidia'
+                'platform': 'nvidia',
+                'tonemap_filter': _probe_tonemap_filter('nvidia')
             })
             return gpu_info
             
@@ -49,55 +157,122 @@ def detect_gpu_acceleration():
                 'available': True,
                 'encoder': 'h264_qsv',
                 'decoder': 'h264_qsv',
-                'platform': 'intel'
+                'platform': 'intel',
+                'tonemap_filter': _probe_tonemap_filter('intel')
+            })
+            return gpu_info
+        
+        # Check for AMD AMF (Windows/Linux)
+        if 'h264_amf' in encoders_output:
+            gpu_info.update({
+                'available': True,
+                'encoder': 'h264_amf',
+                'decoder': 'h264',  # Use software decoder, hardware encoder
+                'platform': 'amd',
+                'tonemap_filter': _probe_tonemap_filter('amd')
             })
             return gpu_info
             
     except Exception as e:
         print(f"GPU-Erkennung fehlgeschlagen: {e}")
+        return None
     
     return gpu_info
 
+def _probe_tonemap_filter(gpu_platform):
+    """First hardware tone mapping filter of the platform that this ffmpeg build has and
+    that works on this machine, or None"""
+    candidates = _TONEMAP_FILTERS.get(gpu_platform)
+    if not candidates:
+        return None
+    p = subprocess.run(['ffmpeg', '-hide_banner', '-filters'], stdin=subprocess.DEVNULL,
+                       stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if p.returncode != 0:
+        return None
+    # Lines look like " ... tonemap_opencl    V->V       Perform HDR to SDR conversion ..."
+    names = {fields[1] for fields in map(str.split, p.stdout.decode('utf-8', 'replace').splitlines())
+             if len(fields) > 1}
+    return next((name for name in candidates if name in names and _tonemap_filter_works(name)), None)
+
+def _tonemap_filter_works(name):
+    """Tone map one generated frame with the filter on its hardware device"""
+    device_args, video_filter = _TONEMAP_TESTS[name]
+    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', *device_args,
+           '-f', 'lavfi', '-i', 'nullsrc=s=64x64', '-vf', video_filter,
+           '-frames:v', '1', '-f', 'null', '-']
+    try:
+        p = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=_TONEMAP_TEST_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return p.returncode == 0
+
+# x264 preset -> NVENC preset
+NVENC_PRESETS = {
+    'ultrafast': 'p1', 'superfast': 'p2', 'veryfast': 'p3',
+    'faster': 'p4', 'fast': 'p5', 'medium': 'p6',
+    'slow': 'p7', 'slower': 'p7', 'veryslow': 'p7'
+}
+
 def get_gpu_encoder_params(gpu_info, crf, preset):
     """Get GPU-specific encoding parameters"""
     if not gpu_info['available']:
         return []
     
-    params = []
-    
-    if gpu_info['platform'] == 'metal':
+    return list(_gpu_encoder_params(gpu_info['platform'], crf, preset))
+
+@functools.lru_cache(maxsize=None)
+def _gpu_encoder_params(platform, crf, preset):
+    """Encoder parameters per (platform, crf, preset); identical for every file of a run"""
+    if platform == 'metal':
         # VideoToolbox (Mac Metal)
         # Convert CRF to quality (0-100, higher = better)
         quality = max(0, min(100, 100 - (crf * 2)))
-        params.extend([
+        return (
             '-c:v', 'h264_videotoolbox',
             '-q:v', str(quality),
-            '-realtime', '0'  # Allow slower encoding for better quality
-        ])
+            '-allow_sw', '0',  # Fail instead of silently encoding in software
+            '-profile:v', 'high',
+            '-coder', 'cabac'
+        )
         
-    elif gpu_info['platform'] == 'nvidia':
-        # NVIDIA NVENC
-        # Convert preset to NVENC preset
-        nvenc_presets = {
-            'ultrafast': 'p1', 'superfast': 'p2', 'veryfast': 'p3',
-            'faster': 'p4', 'fast': 'p5', 'medium': 'p6',
-            'slow': 'p7', 'slower': 'p7', 'veryslow': 'p7'
-        }
-        nvenc_preset = nvenc_presets.get(preset, 'p6')
-        
-        params.extend([
+    elif platform == 'nvidia':
+        # NVIDIA NVENC; -cq only applies in VBR mode, and lookahead plus
+        # adaptive quantization bring the quality close to libx264
+        return (
             '-c:v', 'h264_nvenc',
-            '-preset', nvenc_preset,
+            '-preset', NVENC_PRESETS.get(preset, 'p6'),
+            '-tune', 'hq',
+            '-rc', 'vbr',
             '-cq', str(crf),
-            '-rc', 'constqp'
-        ])
+            '-b:v', '0',
+            '-multipass', 'fullres',
+            '-rc-lookahead', '32',
+            '-spatial_aq', '1',
+            '-temporal_aq', '1',
+            '-profile:v', 'high',
+            '-bf', '3'
+        )
         
-    elif gpu_info['platform'] == 'intel':
+    elif platform == 'intel':
         # Intel QuickSync
-        params.extend([
+        return (
             '-c:v', 'h264_qsv',
             '-preset', preset,
-            '-global_quality', str(crf)
-        ])
+            '-global_quality', str(crf),
+            '-look_ahead', '1',
+            '-look_ahead_depth', '40'
+        )
+    
+    elif platform == 'amd':
+        # AMD AMF; constant QP per frame type
+        return (
+            '-c:v', 'h264_amf',
+            '-quality', 'quality',
+            '-rc', 'cqp',
+            '-qp_i', str(crf),
+            '-qp_p', str(crf),
+            '-qp_b', str(crf)
+        )
     
-    return params
\ No newline at end of file
+    return ()
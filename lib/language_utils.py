@@ -2,6 +2,8 @@
 Language normalization and filtering utilities
 """
 
+import functools
+import sys
 from enum import Enum
 
 # Language code mapping - maps various language codes to standardized 2-letter codes
@@ -22,6 +24,19 @@ LANGUAGE_MAP = {
     'unknown': 'unknown', 'und': 'unknown', '': 'unknown'
 }
 
+# Intern the normalized codes so comparisons downstream hit the identity fast path
+LANGUAGE_MAP = {key: sys.intern(value) for key, value in LANGUAGE_MAP.items()}
+_UNKNOWN = LANGUAGE_MAP['unknown']
+
+# Lookup table that also holds the upper- and title-case spellings seen in tags
+# ('GER', 'Eng'), so those resolve with one dict hit instead of lower() + retry
+_LANGUAGE_LOOKUP = {
+    variant: value
+    for key, value in LANGUAGE_MAP.items()
+    for variant in (key.upper(), key.title(), key)
+}
+_EMPTY_TAGS = {}
+
 class Action(Enum):
     SKIP = "skip"
     REMUX_AUDIO = "remux_audio" # converts to stereo aac
@@ -29,41 +44,81 @@ class Action(Enum):
     TRANCODE_ALL = "transcode_all" # converts to h264 SDR and stereo aac
     CONTAINER_REMUX = "container_remux" # converts to mp4
 
+# Direct Play compatibility as a bitmask: container | video | audio
+COMPAT_CONTAINER, COMPAT_VIDEO, COMPAT_AUDIO = 0b100, 0b010, 0b001
+COMPAT_ALL = COMPAT_CONTAINER | COMPAT_VIDEO | COMPAT_AUDIO
+
+# Required action per compatibility mask; everything not listed needs a full transcode
+_ACTION_BY_MASK = [Action.TRANCODE_ALL] * 8
+_ACTION_BY_MASK[COMPAT_ALL] = Action.SKIP
+_ACTION_BY_MASK[COMPAT_VIDEO | COMPAT_AUDIO] = Action.CONTAINER_REMUX
+_ACTION_BY_MASK[COMPAT_CONTAINER | COMPAT_VIDEO] = Action.REMUX_AUDIO
+_ACTION_BY_MASK[COMPAT_CONTAINER | COMPAT_AUDIO] = Action.TRANCODE_VIDEO
+_ACTION_BY_MASK = tuple(_ACTION_BY_MASK)
+
+def compat_mask(container, video_codec, is_hdr, audio_codecs, audio_channels) -> int:
+    """Fold the Direct Play checks (MP4, H.264 SDR, AAC stereo) into one bitmask.
+    
+    The audio bit is left unset when neither container nor video is compatible,
+    since it cannot change the result (full transcode) in that case.
+    """
+    mask = COMPAT_CONTAINER if container == 'mp4' else 0
+    if not is_hdr and (video_codec or '').lower() == 'h264':
+        mask |= COMPAT_VIDEO
+    if mask and audio_codecs and len(audio_codecs) == len(audio_channels):
+        for codec, channels in zip(audio_codecs, audio_channels):
+            if codec != 'aac' or channels != 2:
+                break
+        else:
+            mask |= COMPAT_AUDIO
+    return mask
+
+def action_for_mask(mask: int) -> Action:
+    """Processing action for a compat_mask() result"""
+    return _ACTION_BY_MASK[mask]
+
 def normalize_language(lang_code):
     """Normalize language code using mapping"""
     if not lang_code:
-        return 'unknown'
-    return LANGUAGE_MAP.get(lang_code.lower(), lang_code.lower())
+        return _UNKNOWN
+    # Known codes in their usual spellings hit directly; only lower() on a miss
+    normalized = _LANGUAGE_LOOKUP.get(lang_code)
+    if normalized is not None:
+        return normalized
+    lowered = lang_code.lower()
+    return LANGUAGE_MAP.get(lowered, lowered)
+
+@functools.lru_cache(maxsize=8)
+def _language_lookups(keep_languages: tuple, sort_languages: tuple):
+    """Membership set and rank table for a language preference, built once per batch"""
+    # Always keep 'unknown' language streams
+    keep_langs = frozenset((*keep_languages, _UNKNOWN)) if keep_languages else None
+    # The first occurrence of a language wins like list.index()
+    sort_index = {}
+    for i, lang in enumerate(sort_languages):
+        sort_index.setdefault(lang, i)
+    return keep_langs, sort_index
 
 def filter_and_sort_streams(streams, languages, keep_languages=None, sort_languages=None):
     """Filter and sort streams based on language preferences"""
     if not streams:
         return []
     
-    # Always keep 'unknown' language streams
-    keep_langs = set(keep_languages or [])
-    keep_langs.add('unknown')
+    keep_langs, sort_index = _language_lookups(tuple(keep_languages or ()), tuple(sort_languages or ()))
     
-    # Filter streams
-    if keep_languages:
-        filtered_streams = []
-        for i, stream in enumerate(streams):
-            tags = stream.get('tags', {})
-            lang = normalize_language(tags.get('language', ''))
-            if lang in keep_langs:
-                filtered_streams.append((i, stream, lang))
-    else:
-        filtered_streams = [(i, stream, normalize_language(stream.get('tags', {}).get('language', ''))) 
-                           for i, stream in enumerate(streams)]
+    # Filter streams in a single pass
+    normalize = normalize_language
+    filtered_streams = []
+    append = filtered_streams.append
+    for i, stream in enumerate(streams):
+        tags = stream.get('tags') or _EMPTY_TAGS
+        lang = normalize(tags.get('language', ''))
+        if keep_langs is None or lang in keep_langs:
+            append((i, stream, lang))
     
     # Sort by language preference if specified
-    if sort_languages:
-        def sort_key(item):
-            _, stream, lang = item
-            try:
-                return sort_languages.index(lang)
-            except ValueError:
-                return len(sort_languages)  # Put unknown languages at end
-        filtered_streams.sort(key=sort_key)
+    if sort_index:
+        unranked = len(sort_languages)  # Put unknown languages at end
+        filtered_streams.sort(key=lambda item: sort_index.get(item[2], unranked))
     
     return filtered_streams
\ No newline at end of file
@@ -2,39 +2,43 @@
 Media file analysis and compatibility checking
 """
 
+import os
+from datetime import datetime
 from pathlib import Path
-from .ffmpeg_runner import ffprobe_streams
-from .language_utils import normalize_language, Action
-from .models import MediaInfo, VideoStreamInfo, AudioStreamInfo, SubtitleStreamInfo
+from typing import Optional
+from .ffmpeg_runner import ffprobe_all
+from .probe_cache import lookup_probe, store_probe
+from .container_fastpath import probe_mp4
+from .language_utils import normalize_language, Action, COMPAT_ALL, compat_mask, action_for_mask
+from .models import is_hdr_metadata, MediaInfo, VideoStreamInfo, AudioStreamInfo, SubtitleStreamInfo
+
+_MP4_SUFFIXES = frozenset({'.mp4', '.m4v'})
 
 def is_hdr_content(video_stream):
     """Detect HDR content based on color characteristics and side data"""
     if not video_stream:
         return False
     
-    # Check color transfer characteristics
-    color_transfer = video_stream.get('color_transfer', '').lower()
-    color_primaries = video_stream.get('color_primaries', '').lower()
-    
-    # Common HDR indicators
-    hdr_transfers = {'smpte2084', 'arib-std-b67', 'smpte428', 'iec61966-2-1'}
-    hdr_primaries = {'bt2020', 'smpte431', 'smpte432'}
-    
-    if color_transfer in hdr_transfers or color_primaries in hdr_primaries:
-        return True
-    
-    # Check side data for HDR metadata
-    side_data_list = video_stream.get('side_data_list', [])
-    for side_data in side_data_list:
-        side_data_type = side_data.get('side_data_type', '').lower()
-        if 'hdr' in side_data_type or 'mastering' in side_data_type or 'content_light' in side_data_type:
-            return True
-    
-    return False
+    return is_hdr_metadata(video_stream.get('color_transfer'), video_stream.get('color_primaries'),
+                           video_stream.get('side_data_list'))
 
-def discover_media(path: Path):
-    """Analyze media file and return detailed information"""
-    streams = ffprobe_streams(path)
+def discover_media(path: Path, st: os.stat_result = None):
+    """Analyze media file and return detailed information
+    
+    st may carry a stat result the caller already has, saving a round-trip.
+    """
+    suffix = path.suffix.lower()
+    # Reuse the stored probe result while size and mtime are unchanged
+    if st is None:
+        st = path.stat()
+    cached = lookup_probe(path, st)
+    if cached is None:
+        # Plain MP4s can usually be read without spawning ffprobe
+        probed = probe_mp4(path) if suffix in _MP4_SUFFIXES else None
+        streams, duration = probed or ffprobe_all(path)
+        store_probe(path, st, streams, duration)
+    else:
+        streams, duration = cached
     v = next((s for s in streams if s.get('codec_type') == 'video'), None)
     a = [s for s in streams if s.get('codec_type') == 'audio']
     s = [s for s in streams if s.get('codec_type') == 'subtitle']
@@ -66,26 +70,33 @@ def discover_media(path: Path):
         'audio_channels': audio_channels,
         'audio_languages': audio_languages,
         'subtitle_languages': subtitle_languages,
+        'video_stream': v,
         'audio_streams': a,
         'subtitle_streams': s,
-        'container': path.suffix.lower().lstrip('.'),
+        'container': suffix[1:],
         'has_audio': len(a) > 0,
         'has_video': v is not None,
         'is_hdr': is_hdr,
+        'duration': duration,
     }
 
 def discover_media_pydantic(path: Path) -> MediaInfo:
     """Analyze media file and return Pydantic MediaInfo model"""
-    streams = ffprobe_streams(path)
-    v = next((s for s in streams if s.get('codec_type') == 'video'), None)
-    a = [s for s in streams if s.get('codec_type') == 'audio']
-    s = [s for s in streams if s.get('codec_type') == 'subtitle']
+    return media_info_from_discovery(path, discover_media(path))
+
+def media_info_from_discovery(path: Path, info: dict) -> MediaInfo:
+    """Build the Pydantic MediaInfo model from a discover_media() result without probing again"""
+    v = info.get('video_stream')
+    if v is None and info.get('has_video'):
+        v = {'codec_name': info.get('video_codec')}
+    a = info.get('audio_streams', [])
+    s = info.get('subtitle_streams', [])
     
     # Create video stream info
     video_stream = None
     if v:
         video_stream = VideoStreamInfo(
-            codec_name=v.get('codec_name', 'unknown'),
+            codec_name=v.get('codec_name') or 'unknown',
             color_transfer=v.get('color_transfer'),
             color_primaries=v.get('color_primaries'),
             side_data_list=v.get('side_data_list', [])
@@ -99,8 +110,8 @@ def discover_media_pydantic(path: Path) -> MediaInfo:
         normalized_lang = normalize_language(lang)
         
         audio_stream = AudioStreamInfo(
-            codec_name=stream.get('codec_name', 'unknown'),
-            channels=int(stream.get('channels', 0)),
+            codec_name=stream.get('codec_name') or 'unknown',
+            channels=int(stream.get('channels') or 0),
             language=normalized_lang if normalized_lang else None,
             tags=tags
         )
@@ -114,7 +125,7 @@ def discover_media_pydantic(path: Path) -> MediaInfo:
         normalized_lang = normalize_language(lang)
         
         subtitle_stream = SubtitleStreamInfo(
-            codec_name=stream.get('codec_name', 'unknown'),
+            codec_name=stream.get('codec_name') or 'unknown',
             language=normalized_lang if normalized_lang else None,
             tags=tags
         )
@@ -122,60 +133,65 @@ def discover_media_pydantic(path: Path) -> MediaInfo:
     
     return MediaInfo(
         file_path=path,
-        container=path.suffix.lower().lstrip('.'),
+        container=path.suffix[1:].lower(),
         video_stream=video_stream,
         audio_streams=audio_streams,
         subtitle_streams=subtitle_streams
     )
 
+def _info_compat_mask(info) -> int:
+    """Compatibility bitmask of a discover_media() result"""
+    return compat_mask(info['container'], info['video_codec'], info.get('is_hdr', False),
+                       info['audio_codecs'] if info['has_audio'] else None, info['audio_channels'])
+
 def needs_processing(info, out_ext: str):
     """Decide whether we must transcode or can remux, or skip entirely.
        Direct-Play-Ziel: MP4 + H.264 SDR + AAC Stereo (Apple TV compatibility)
     """
-    container_ok = info['container'] == 'mp4'
-    video_ok = (info['video_codec'] or '').lower() in {'h264'} and not info.get('is_hdr', False)
-    audio_ok = info['has_audio'] and info['audio_codecs'] and all(c in {'aac'} for c in info['audio_codecs']) and all(ch == 2 for ch in info['audio_channels'])
-
-    if container_ok and video_ok and audio_ok:
-        return Action.SKIP  # vollständig kompatibel
-    elif not container_ok and video_ok and audio_ok:
-        # Nur Container muss zu MP4 geändert werden
-        return Action.CONTAINER_REMUX
-    elif container_ok and video_ok and not audio_ok:
-        # Video ist bereits H.264 SDR, nur Audio zu AAC Stereo
-        return Action.REMUX_AUDIO
-    elif container_ok and audio_ok and not video_ok:
-        # Audio ist bereits AAC Stereo, nur Video transkodieren
-        return Action.TRANCODE_VIDEO
-    else:
-        # Beide müssen transkodiert werden
-        return Action.TRANCODE_ALL
+    # SKIP: vollständig kompatibel, CONTAINER_REMUX: nur Container zu MP4,
+    # REMUX_AUDIO: nur Audio zu AAC Stereo, TRANCODE_VIDEO: nur Video transkodieren,
+    # TRANCODE_ALL: beide müssen transkodiert werden
+    return action_for_mask(_info_compat_mask(info))
 
 def is_direct_play_compatible(info):
     """Check if file is already Direct Play compatible for Apple TV 4K"""
-    container_ok = info['container'] == 'mp4'
-    video_ok = (info['video_codec'] or '').lower() in {'h264'} and not info.get('is_hdr', False)
-    audio_ok = info['has_audio'] and info['audio_codecs'] and all(c in {'aac'} for c in info['audio_codecs']) and all(ch == 2 for ch in info['audio_channels'])
-    
-    return container_ok and video_ok and audio_ok
+    return _info_compat_mask(info) == COMPAT_ALL
+
+# Action descriptions for the CSV export
+ACTION_DESCRIPTIONS = {
+    Action.SKIP: "Already compatible, skip processing",
+    Action.CONTAINER_REMUX: "Container remux to MP4",
+    Action.REMUX_AUDIO: "Audio remux to stereo AAC",
+    Action.TRANCODE_VIDEO: "Video transcode to H.264 SDR", 
+    Action.TRANCODE_ALL: "Full transcode (video + audio)"
+}
+
+# CSV representation of booleans, indexed by the bool itself
+_BOOL_STR = ('False', 'True')
+
+def _size_mb(size_bytes: int) -> float:
+    """Size in MB rounded (half up) to two decimals"""
+    # Round in integer hundredths of a MB; only the final scaling touches floats
+    return ((size_bytes * 100 + 524288) >> 20) / 100
 
-def analyze_file_for_csv(src: Path):
-    """Analyze a single file and return data for CSV export"""
-    from datetime import datetime
-    from .file_utils import format_file_size
+def analysis_timestamp() -> str:
+    """Timestamp format of the analysis_date column"""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def analyze_file_for_csv(src: Path, *, now_str: Optional[str] = None, info: Optional[dict] = None):
+    """Analyze a single file and return data for CSV export.
+    
+    Batch callers pass now_str (see analysis_timestamp()) so the date is formatted once,
+    and info if they already have the discover_media() result.
+    """
+    if now_str is None:
+        now_str = analysis_timestamp()
     
     try:
-        info = discover_media(src)
-        action_needed = needs_processing(info, 'mp4')
-        
-        # Create action description
-        action_descriptions = {
-            Action.SKIP: "Already compatible, skip processing",
-            Action.CONTAINER_REMUX: "Container remux to MP4",
-            Action.REMUX_AUDIO: "Audio remux to stereo AAC",
-            Action.TRANCODE_VIDEO: "Video transcode to H.264 SDR", 
-            Action.TRANCODE_ALL: "Full transcode (video + audio)"
-        }
+        if info is None:
+            info = discover_media(src)
+        mask = _info_compat_mask(info)
+        action_needed = action_for_mask(mask)
         
         file_stats = src.stat()
         file_size_bytes = file_stats.st_size
@@ -184,20 +200,21 @@ def analyze_file_for_csv(src: Path):
             'file_path': str(src),
             'file_name': src.name,
             'file_size_bytes': file_size_bytes,
-            'file_size_mb': round(file_size_bytes / (1024 * 1024), 2),
+            'file_size_mb': _size_mb(file_size_bytes),
             'container': info['container'].upper(),
             'video_codec': info['video_codec'] or 'None',
-            'is_hdr': 'True' if info.get('is_hdr', False) else 'False',
+            'is_hdr': _BOOL_STR[bool(info.get('is_hdr', False))],
             'audio_codecs': ', '.join(info['audio_codecs']) if info['audio_codecs'] else 'None',
             'audio_channels': ', '.join(map(str, info['audio_channels'])) if info['audio_channels'] else 'None',
             'audio_languages': ', '.join(info['audio_languages']) if info['audio_languages'] else 'unknown',
-            'has_video': 'True' if info['has_video'] else 'False',
-            'has_audio': 'True' if info['has_audio'] else 'False',
-            'direct_play_compatible': 'True' if is_direct_play_compatible(info) else 'False',
-            'action_needed': action_descriptions.get(action_needed, str(action_needed)),
-            'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'has_video': _BOOL_STR[info['has_video']],
+            'has_audio': _BOOL_STR[info['has_audio']],
+            'direct_play_compatible': _BOOL_STR[mask == COMPAT_ALL],
+            'action_needed': ACTION_DESCRIPTIONS.get(action_needed, str(action_needed)),
+            'analysis_date': now_str,
             'processed': 'False',
-            'processing_date': ''
+            'processing_date': '',
+            'file_mtime_ns': file_stats.st_mtime_ns
         }
         
         return file_data
@@ -209,7 +226,7 @@ def analyze_file_for_csv(src: Path):
             'file_path': str(src),
             'file_name': src.name,
             'file_size_bytes': file_stats.st_size,
-            'file_size_mb': round(file_stats.st_size / (1024 * 1024), 2),
+            'file_size_mb': _size_mb(file_stats.st_size),
             'container': 'ERROR',
             'video_codec': f'Analysis failed: {str(e)}',
             'is_hdr': 'False',
@@ -220,7 +237,8 @@ def analyze_file_for_csv(src: Path):
             'has_audio': 'Unknown',
             'direct_play_compatible': 'False',
             'action_needed': 'Analysis failed',
-            'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'analysis_date': now_str,
             'processed': 'False',
-            'processing_date': ''
-        }
\ No newline at end of file
+            'processing_date': '',
+            'file_mtime_ns': file_stats.st_mtime_ns
+        }
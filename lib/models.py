@@ -2,13 +2,29 @@
 Pydantic models for data validation and serialization
 """
 
+import re
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr, validator
 from enum import Enum
 
-from .language_utils import Action
+from .language_utils import Action, COMPAT_ALL, compat_mask, action_for_mask
+
+# Common HDR indicators (ffprobe reports these in lower case)
+_HDR_TRANSFERS = frozenset({'smpte2084', 'arib-std-b67', 'smpte428', 'iec61966-2-1'})
+_HDR_PRIMARIES = frozenset({'bt2020', 'smpte431', 'smpte432'})
+_HDR_SIDE_DATA = re.compile(r'hdr|mastering|content_light', re.IGNORECASE).search
+
+def _matches(value, known) -> bool:
+    return bool(value) and (value in known or value.lower() in known)
+
+def is_hdr_metadata(color_transfer, color_primaries, side_data_list) -> bool:
+    """Detect HDR from color characteristics and side data"""
+    if _matches(color_transfer, _HDR_TRANSFERS) or _matches(color_primaries, _HDR_PRIMARIES):
+        return True
+    return any(_HDR_SIDE_DATA(side_data.get('side_data_type') or '') for side_data in side_data_list or ())
 
 
 class AudioStreamInfo(BaseModel):
@@ -34,19 +50,7 @@ class VideoStreamInfo(BaseModel):
     
     def is_hdr(self) -> bool:
         """Check if this video stream contains HDR content"""
-        hdr_transfers = {'smpte2084', 'arib-std-b67', 'smpte428', 'iec61966-2-1'}
-        hdr_primaries = {'bt2020', 'smpte431', 'smpte432'}
-        
-        if (self.color_transfer and self.color_transfer.lower() in hdr_transfers or
-            self.color_primaries and self.color_primaries.lower() in hdr_primaries):
-            return True
-        
-        for side_data in self.side_data_list:
-            side_data_type = side_data.get('side_data_type', '').lower()
-            if 'hdr' in side_data_type or 'mastering' in side_data_type or 'content_light' in side_data_type:
-                return True
-        
-        return False
+        return is_hdr_metadata(self.color_transfer, self.color_primaries, self.side_data_list)
 
 
 class SubtitleStreamInfo(BaseModel):
@@ -63,6 +67,8 @@ class MediaInfo(BaseModel):
     video_stream: Optional[VideoStreamInfo] = None
     audio_streams: List[AudioStreamInfo] = Field(default_factory=list)
     subtitle_streams: List[SubtitleStreamInfo] = Field(default_factory=list)
+    # Memoized compat_mask(); the streams are not modified after construction
+    _compat: Optional[int] = PrivateAttr(default=None)
     
     @property
     def has_video(self) -> bool:
@@ -96,34 +102,19 @@ class MediaInfo(BaseModel):
     def subtitle_languages(self) -> List[str]:
         return [stream.language or 'unknown' for stream in self.subtitle_streams]
     
+    def _compat_mask(self) -> int:
+        if self._compat is None:
+            self._compat = compat_mask(self.container, self.video_codec, self.is_hdr,
+                                       self.audio_codecs, self.audio_channels)
+        return self._compat
+    
     def is_direct_play_compatible(self) -> bool:
         """Check if file is already Direct Play compatible for Apple TV 4K"""
-        container_ok = self.container == 'mp4'
-        video_ok = (self.video_codec or '').lower() == 'h264' and not self.is_hdr
-        audio_ok = (self.has_audio and 
-                   all(codec == 'aac' for codec in self.audio_codecs) and 
-                   all(channels == 2 for channels in self.audio_channels))
-        
-        return container_ok and video_ok and audio_ok
+        return self._compat_mask() == COMPAT_ALL
     
     def get_required_action(self) -> Action:
         """Determine what processing action is needed"""
-        container_ok = self.container == 'mp4'
-        video_ok = (self.video_codec or '').lower() == 'h264' and not self.is_hdr
-        audio_ok = (self.has_audio and 
-                   all(codec == 'aac' for codec in self.audio_codecs) and 
-                   all(channels == 2 for channels in self.audio_channels))
-
-        if container_ok and video_ok and audio_ok:
-            return Action.SKIP
-        elif not container_ok and video_ok and audio_ok:
-            return Action.CONTAINER_REMUX
-        elif container_ok and video_ok and not audio_ok:
-            return Action.REMUX_AUDIO
-        elif container_ok and audio_ok and not video_ok:
-            return Action.TRANCODE_VIDEO
-        else:
-            return Action.TRANCODE_ALL
+        return action_for_mask(self._compat_mask())
 
 
 class ProcessingResult(BaseModel):
@@ -163,6 +154,7 @@ class CacheEntry(BaseModel):
     analysis_date: datetime
     processed: bool = False
     processing_date: Optional[datetime] = None
+    file_mtime_ns: Optional[int] = None
     
     @validator('file_size_bytes')
     def validate_file_size(cls, v):
@@ -192,6 +184,7 @@ class ProcessingConfig(BaseModel):
     sort_languages: List[str] = Field(default_factory=list)
     action_filter: Optional[Action] = None
     limit: Optional[int] = None
+    ffmpeg_threads: Optional[int] = Field(default=None, ge=1)
     
     @validator('preset')
     def validate_preset(cls, v):
@@ -208,6 +201,15 @@ class ProcessingConfig(BaseModel):
         return v
 
 
+# Statistics field counting each process_file() result; anything else is an error
+_RESULT_FIELDS = {
+    'converted': 'converted_files', 'processed': 'converted_files',
+    'skipped': 'skipped_files', 'planned': 'skipped_files', 'filtered': 'skipped_files',
+    'remuxed': 'remuxed_files',
+    'interrupted': 'interrupted_files',
+}
+
+
 class BatchProcessingStats(BaseModel):
     """Statistics for batch processing operation"""
     total_files: int = 0
@@ -228,15 +230,15 @@ class BatchProcessingStats(BaseModel):
     
     def add_result(self, result: str):
         """Add a processing result to the statistics"""
-        if result in ('converted', 'processed'):
-            self.converted_files += 1
-        elif result in ('skipped', 'planned', 'filtered'):
-            self.skipped_files += 1
-        elif result in ('remuxed',):
-            self.remuxed_files += 1
-        elif result in ('interrupted',):
-            self.interrupted_files += 1
-        else:
-            self.error_files += 1
+        field = _RESULT_FIELDS.get(result, 'error_files')
+        setattr(self, field, getattr(self, field) + 1)
+        
+        self.processed_files += 1
+    
+    def add_results(self, results: List[str]):
+        """Add many processing results at once (one update per distinct result)"""
+        for result, count in Counter(results).items():
+            field = _RESULT_FIELDS.get(result, 'error_files')
+            setattr(self, field, getattr(self, field) + count)
         
-        self.processed_files += 1
\ No newline at end of file
+        self.processed_files += len(results)
\ No newline at end of file
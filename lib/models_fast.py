@@ -0,0 +1,94 @@
+"""
+Lightweight, unvalidated twins of the Pydantic media models for worker results
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .language_utils import normalize_language
+from .models import MediaInfo, VideoStreamInfo, AudioStreamInfo, SubtitleStreamInfo
+
+
+@dataclass(slots=True)
+class FastAudio:
+    """Audio stream as reported by discover_media()"""
+    codec_name: str
+    channels: int
+    language: Optional[str] = None
+    tags: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class FastVideo:
+    """Video stream as reported by discover_media(), including the HDR metadata"""
+    codec_name: str
+    color_transfer: Optional[str] = None
+    color_primaries: Optional[str] = None
+    side_data_list: List[Dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class FastSubtitle:
+    """Subtitle stream as reported by discover_media()"""
+    codec_name: str
+    language: Optional[str] = None
+    tags: Dict[str, Any] = field(default_factory=dict)
+
+
+def _language(tags: dict) -> Optional[str]:
+    """Normalized language of a stream's tags (None when untagged)"""
+    return normalize_language(tags.get('language', '')) or None
+
+
+@dataclass(slots=True)
+class FastMediaInfo:
+    """Media file information without per-field validation"""
+    file_path: Path
+    container: str
+    video_stream: Optional[FastVideo] = None
+    audio_streams: List[FastAudio] = field(default_factory=list)
+    subtitle_streams: List[FastSubtitle] = field(default_factory=list)
+
+    @classmethod
+    def from_discovery(cls, path: Path, info: dict) -> 'FastMediaInfo':
+        """Build from a discover_media() result (same fields as media_info_from_discovery())"""
+        v = info.get('video_stream')
+        if v is None and info.get('has_video'):
+            v = {'codec_name': info.get('video_codec')}
+        video = FastVideo(
+            v.get('codec_name') or 'unknown',
+            v.get('color_transfer'),
+            v.get('color_primaries'),
+            v.get('side_data_list', [])
+        ) if v else None
+        audio = []
+        for stream in info.get('audio_streams', []):
+            tags = stream.get('tags', {})
+            audio.append(FastAudio(stream.get('codec_name') or 'unknown', int(stream.get('channels') or 0),
+                                   _language(tags), tags))
+        subtitles = []
+        for stream in info.get('subtitle_streams', []):
+            tags = stream.get('tags', {})
+            subtitles.append(FastSubtitle(stream.get('codec_name') or 'unknown', _language(tags), tags))
+        return cls(path, info['container'], video, audio, subtitles)
+
+    def to_pydantic(self) -> MediaInfo:
+        """Validate into the Pydantic MediaInfo model (call at the system boundary)"""
+        v = self.video_stream
+        return MediaInfo(
+            file_path=self.file_path,
+            container=self.container,
+            video_stream=VideoStreamInfo(
+                codec_name=v.codec_name, color_transfer=v.color_transfer,
+                color_primaries=v.color_primaries, side_data_list=v.side_data_list
+            ) if v else None,
+            audio_streams=[
+                AudioStreamInfo(codec_name=a.codec_name, channels=a.channels, language=a.language, tags=a.tags)
+                for a in self.audio_streams
+            ],
+            subtitle_streams=[
+                SubtitleStreamInfo(codec_name=s.codec_name, language=s.language, tags=s.tags)
+                for s in self.subtitle_streams
+            ]
+        )
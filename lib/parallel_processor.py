@@ -2,31 +2,66 @@
 Dask-based parallel file processing
 """
 
+import multiprocessing
 import os
+import signal
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable
-from concurrent.futures import ProcessPoolExecutor, as_completed
-import dask
-from dask import delayed
-from dask.distributed import Client, as_completed as dask_as_completed
-from dask.diagnostics import ProgressBar
+from typing import List, Dict, Any, Optional, Callable, Tuple, TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 from .models import MediaInfo, ProcessingConfig, ProcessingResult, BatchProcessingStats
 from .media_analyzer import discover_media
+from .models_fast import FastMediaInfo
 from .processor import process_file
+from .cache_manager import read_cache_csv, flush_cache
+from .probe_cache import open_probe_cache, probe_cache_path, probe_cache_refreshing, flush_probe_cache
+from .ffmpeg_runner import stop_active_runs, worker_signal_handler
 from .rich_console import rich_output
 
+# Dask is only imported when the distributed path is actually used
+if TYPE_CHECKING:
+    from dask.distributed import Client
+
+
+def _worker_init(cache_path: Optional[Path], refresh: bool = False, stop_event=None):
+    """Pool initializer: import the processing stack and open the probe cache once per worker
+    
+    Workers are forked with the parent's signal handlers, which flush the CSV
+    caches and exit. Only the parent may write the CSV, so workers ignore Ctrl+C
+    (it reaches the whole process group) and stop their ffmpeg run on SIGTERM
+    or when the parent sets stop_event.
+    """
+    from . import media_analyzer, processor
+    open_probe_cache(cache_path, refresh)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, worker_signal_handler)
+    if stop_event is not None:
+        threading.Thread(target=_stop_on_event, args=(stop_event,), daemon=True).start()
+
+def _stop_on_event(stop_event):
+    """Worker thread: stop the running conversion once the parent is interrupted"""
+    stop_event.wait()
+    stop_active_runs()
+
 
 class ParallelProcessor:
     """Dask-based parallel processor for media files"""
     
     def __init__(self, max_workers: Optional[int] = None, use_distributed: bool = False):
         self.max_workers = max_workers or min(os.cpu_count() or 1, 4)  # Limit to 4 for FFmpeg
+        # ffprobe runs in a subprocess, so analysis threads just wait and can be plentiful
+        self.analysis_workers = max_workers or self.get_optimal_worker_count('analysis')
         self.use_distributed = use_distributed
-        self.client: Optional[Client] = None
+        self.client: Optional['Client'] = None
+        # Worker pools are created on first use and reused across batches
+        self._pools: Dict[int, ProcessPoolExecutor] = {}
+        # Set on an interrupt so that all workers stop their ffmpeg runs
+        self._stop_event = None
         
         if use_distributed:
             try:
+                from dask.distributed import Client
                 self.client = Client(processes=True, n_workers=self.max_workers, 
                                    threads_per_worker=1, memory_limit='2GB')
                 rich_output.print_info(f"Dask distributed client started with {self.max_workers} workers")
@@ -39,8 +74,37 @@ class ParallelProcessor:
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
+        # Leaving on an error or interrupt must not start the queued conversions
+        self.close(cancel_pending=exc_type is not None)
+    
+    def close(self, cancel_pending: bool = False):
+        """Shut down the worker pools and the distributed client
+        
+        With cancel_pending, queued files are dropped and running conversions
+        are stopped instead of waited for.
+        """
+        if cancel_pending and self._stop_event is not None:
+            self._stop_event.set()
+        for pool in self._pools.values():
+            pool.shutdown(cancel_futures=cancel_pending)
+        self._pools.clear()
+        if cancel_pending:
+            # Pools created after this must not start out stopped
+            self._stop_event = None
         if self.client:
             self.client.close()
+            self.client = None
+    
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        """Long-lived process pool with the given number of workers"""
+        pool = self._pools.get(workers)
+        if pool is None:
+            if self._stop_event is None:
+                self._stop_event = multiprocessing.Event()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init,
+                                       initargs=(probe_cache_path(), probe_cache_refreshing(), self._stop_event))
+            self._pools[workers] = pool
+        return pool
     
     def analyze_files_parallel(self, file_paths: List[Path]) -> List[MediaInfo]:
         """Analyze multiple files in parallel"""
@@ -56,18 +120,38 @@ class ParallelProcessor:
     
     def _analyze_files_distributed(self, file_paths: List[Path]) -> List[MediaInfo]:
         """Analyze files using Dask distributed"""
-        delayed_tasks = [delayed(self._analyze_single_file)(path) for path in file_paths]
+        from dask.distributed import as_completed as dask_as_completed
         
-        with ProgressBar():
-            results = dask.compute(*delayed_tasks)
+        futures = self.client.map(self._analyze_single_file, file_paths, pure=False)
+        results = []
+        
+        progress = rich_output.create_batch_progress()
+        with progress:
+            task_id = progress.add_task("Analyzing files...", total=len(file_paths))
+            
+            # Stream results as they land; workers return slotted dataclasses, validate once here
+            for future in dask_as_completed(futures):
+                result = future.result()
+                future.release()
+                if result is not None:
+                    results.append(result.to_pydantic())
+                progress.update(task_id, advance=1)
         
-        return [result for result in results if result is not None]
+        return results
     
     def _analyze_files_concurrent(self, file_paths: List[Path]) -> List[MediaInfo]:
         """Analyze files using concurrent futures"""
-        results = []
+        infos = self.discover_files_parallel(file_paths)
+        return [FastMediaInfo.from_discovery(path, infos[path]).to_pydantic()
+                for path in file_paths if path in infos]
+    
+    def discover_files_parallel(self, file_paths: List[Path],
+                                file_stats: Optional[Dict[Path, os.stat_result]] = None) -> Dict[Path, Dict[str, Any]]:
+        """Probe multiple files in parallel and return their discover_media() results by path"""
+        results = {}
+        file_stats = file_stats or {}
         
-        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+        with ThreadPoolExecutor(max_workers=self.analysis_workers) as executor:
             # Create progress bar
             progress = rich_output.create_batch_progress()
             
@@ -76,7 +160,7 @@ class ParallelProcessor:
                 
                 # Submit all tasks
                 future_to_path = {
-                    executor.submit(self._analyze_single_file, path): path 
+                    executor.submit(self._discover_single_file, path, file_stats.get(path)): path 
                     for path in file_paths
                 }
                 
@@ -85,78 +169,68 @@ class ParallelProcessor:
                     path = future_to_path[future]
                     try:
                         result = future.result()
-                        if result:
-                            results.append(result)
+                        if result is not None:
+                            results[path] = result
                     except Exception as e:
                         rich_output.print_error(f"Analysis failed for {path}: {e}")
                     
                     progress.update(task_id, advance=1)
         
+        flush_probe_cache()
         return results
     
     @staticmethod
-    def _analyze_single_file(path: Path) -> Optional[MediaInfo]:
+    def _discover_single_file(path: Path, st: Optional[os.stat_result] = None) -> Optional[Dict[str, Any]]:
+        """Probe a single file (runs in an analysis thread or a Dask worker)"""
+        try:
+            return discover_media(path, st)
+        except Exception as e:
+            return None
+    
+    @staticmethod
+    def _analyze_single_file(path: Path) -> Optional[FastMediaInfo]:
         """Analyze a single file (static method for multiprocessing)"""
+        info_dict = ParallelProcessor._discover_single_file(path)
+        if info_dict is None:
+            return None
         try:
-            from .media_analyzer import discover_media
-            info_dict = discover_media(path)
-            
-            # Convert to Pydantic model
-            media_info = MediaInfo(
-                file_path=path,
-                container=info_dict['container'],
-                video_stream=None,
-                audio_streams=[],
-                subtitle_streams=[]
-            )
-            
-            # Add video stream if present
-            if info_dict['has_video']:
-                from .models import VideoStreamInfo
-                video_stream = VideoStreamInfo(
-                    codec_name=info_dict['video_codec'] or 'unknown'
-                )
-                media_info.video_stream = video_stream
-            
-            # Add audio streams
-            if info_dict['has_audio']:
-                from .models import AudioStreamInfo
-                for i, codec in enumerate(info_dict['audio_codecs']):
-                    channels = info_dict['audio_channels'][i] if i < len(info_dict['audio_channels']) else 0
-                    language = info_dict['audio_languages'][i] if i < len(info_dict['audio_languages']) else 'unknown'
-                    
-                    audio_stream = AudioStreamInfo(
-                        codec_name=codec,
-                        channels=channels,
-                        language=language
-                    )
-                    media_info.audio_streams.append(audio_stream)
-            
-            return media_info
-            
+            return FastMediaInfo.from_discovery(path, info_dict)
         except Exception as e:
             return None
     
     def process_batch_parallel(self, file_paths: List[Path], config: ProcessingConfig,
                              output_dir: Optional[Path] = None,
-                             cache_path: Optional[Path] = None) -> BatchProcessingStats:
+                             cache_path: Optional[Path] = None,
+                             gpu_info: Optional[Dict] = None,
+                             file_stats: Optional[Dict[Path, os.stat_result]] = None) -> BatchProcessingStats:
         """Process multiple files in parallel with controlled concurrency"""
         if not file_paths:
             return BatchProcessingStats()
         
-        rich_output.print_info(f"Processing {len(file_paths)} files with {self.max_workers} workers...")
+        # Several single-threaded encoders beat one multi-threaded encoder; split the
+        # cores between the ffmpeg processes so workers * threads ~= cpu_count
+        processing_workers = min(self.max_workers, len(file_paths))
+        threads = config.ffmpeg_threads or max(1, (os.cpu_count() or 1) // processing_workers)
+        
+        rich_output.print_info(f"Processing {len(file_paths)} files with {processing_workers} workers "
+                               f"({threads} ffmpeg threads each)...")
         
         stats = BatchProcessingStats(total_files=len(file_paths))
         stats.start_time = None  # Will be set when processing starts
         
-        # For FFmpeg processing, we want to limit concurrency to avoid resource conflicts
-        # Use a smaller number of workers for actual processing
-        processing_workers = min(self.max_workers, 2)  # Max 2 concurrent FFmpeg processes
+        # Probe everything up front with the wider analysis pool and hand the results
+        # to the workers, so process_file does not run ffprobe a second time
+        infos = self.discover_files_parallel(file_paths, file_stats)
         
-        results = []
-        with ProcessPoolExecutor(max_workers=processing_workers) as executor:
-            progress = rich_output.create_batch_progress()
-            
+        # Write out pending updates now: while workers run, the CSV must not be
+        # rewritten from this process's copy (e.g. by the signal handler)
+        if cache_path:
+            flush_cache(cache_path)
+        
+        executor = self._get_pool(processing_workers)
+        progress = rich_output.create_batch_progress()
+        
+        try:
             with progress:
                 task_id = progress.add_task("Processing files...", total=len(file_paths))
                 
@@ -164,51 +238,70 @@ class ParallelProcessor:
                 future_to_path = {
                     executor.submit(
                         self._process_single_file_wrapper,
-                        path, output_dir, config, cache_path
+                        path, output_dir, config, cache_path, infos.get(path), gpu_info, threads
                     ): path 
                     for path in file_paths
                 }
                 
-                # Process completed tasks
+                # Process completed tasks; worker output is replayed here in one piece per file
+                results = []
                 for future in as_completed(future_to_path):
                     path = future_to_path[future]
                     try:
-                        result = future.result()
-                        results.append(result)
-                        stats.add_result(result)
+                        result, log = future.result()
+                        rich_output.print_captured(log)
                     except Exception as e:
                         rich_output.print_error(f"Processing failed for {path}: {e}")
-                        stats.add_result('error')
+                        result = 'error'
+                    results.append(result)
                     
                     progress.update(task_id, advance=1)
+        except BaseException:
+            # Interrupt (the signal handler exits via SystemExit): stop the workers'
+            # ffmpeg runs and wait for them, so their journal entries are complete
+            self.close(cancel_pending=True)
+            raise
+        finally:
+            # Workers only journal their cache updates; merge them into the CSV once, here
+            if cache_path and cache_path.exists():
+                read_cache_csv(cache_path)
+                flush_cache(cache_path)
         
+        stats.add_results(results)
         return stats
     
     @staticmethod
     def _process_single_file_wrapper(file_path: Path, output_dir: Optional[Path], 
-                                   config: ProcessingConfig, cache_path: Optional[Path]) -> str:
-        """Wrapper for process_file to work with multiprocessing"""
-        try:
-            target_dir = output_dir if output_dir else file_path.parent
-            
-            result, _ = process_file(
-                file_path, target_dir, config.crf, config.preset, 
-                False,  # dry_run = False
-                False,  # interactive = False 
-                True,   # auto_yes = True (no user interaction in parallel mode)
-                False,  # debug = False
-                config.keep_languages, config.sort_languages,
-                None,   # gpu_info - will be detected in subprocess
-                config.use_gpu, config.action_filter, config.delete_original,
-                cache_path
-            )
-            return result
-        except Exception as e:
-            return 'error'
+                                   config: ProcessingConfig, cache_path: Optional[Path],
+                                   info: Optional[Dict[str, Any]] = None,
+                                   gpu_info: Optional[Dict] = None,
+                                   threads: Optional[int] = None) -> Tuple[str, str]:
+        """Wrapper for process_file to work with multiprocessing; returns (result, recorded output)"""
+        with rich_output.capture() as recorder:
+            try:
+                target_dir = output_dir if output_dir else file_path.parent
+                
+                result, _ = process_file(
+                    file_path, target_dir, config.crf, config.preset, 
+                    False,  # dry_run = False
+                    False,  # interactive = False 
+                    True,   # auto_yes = True (no user interaction in parallel mode)
+                    False,  # debug = False
+                    config.keep_languages, config.sort_languages,
+                    gpu_info, config.use_gpu, config.action_filter, config.delete_original,
+                    cache_path, info, threads
+                )
+            except Exception as e:
+                rich_output.print_error(f"Fehler bei {file_path}", str(e))
+                result = 'error'
+            finally:
+                # Pool workers do not run atexit handlers
+                flush_probe_cache()
+        return result, recorder.export_text(styles=True)
     
     def create_analysis_tasks(self, root_path: Path) -> List[Path]:
         """Create list of files to analyze from root path"""
-        from .file_utils import VIDEO_EXTS
+        from .file_utils import VIDEO_EXTS, iter_video_files
         
         if root_path.is_file():
             if root_path.suffix.lower() in VIDEO_EXTS:
@@ -217,21 +310,15 @@ class ParallelProcessor:
                 return []
         
         # Collect video files from directory
-        video_files = []
-        for ext in VIDEO_EXTS:
-            video_files.extend(root_path.rglob(f'*{ext}'))
-            video_files.extend(root_path.rglob(f'*{ext.upper()}'))
-        
-        # Remove duplicates and filter for actual files
-        return list(set([p for p in video_files if p.is_file()]))
+        return list(iter_video_files(root_path))
     
     def get_optimal_worker_count(self, task_type: str = 'analysis') -> int:
         """Get optimal worker count based on task type"""
         cpu_count = os.cpu_count() or 1
         
         if task_type == 'analysis':
-            # Analysis can be more parallel
-            return min(cpu_count, 8)
+            # Analysis threads mostly wait on ffprobe subprocesses
+            return min(cpu_count * 2, 32)
         elif task_type == 'processing':
             # FFmpeg processing should be limited to avoid conflicts
             return min(cpu_count, 2)
@@ -0,0 +1,174 @@
+"""
+Persistent ffprobe result cache keyed by (path, size, mtime)
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# Optional faster JSON codec; both variants produce/accept UTF-8 bytes here
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+    _json_loads = json.loads
+
+# Override the cache location; an empty value disables the cache
+PROBE_CACHE_ENV = 'PLEX_DP_PROBE_CACHE'
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS probe ('
+    'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, '
+    'streams_json BLOB NOT NULL, duration REAL)'
+)
+
+# Bumped when stored results of older versions may be wrong; such databases are emptied once
+_CACHE_VERSION = 2
+
+_cache_path = None
+_configured = False
+# Refresh mode ignores results stored before it was enabled but still records new ones
+_refresh = False
+_refreshed = set()
+# SQLite connections must not be shared between threads or across fork()
+_local = threading.local()
+
+# New results are buffered and written in one transaction per batch
+_PENDING_BATCH_SIZE = 256
+_pending = {}
+_pending_lock = threading.Lock()
+
+# Without a database, results are still remembered for the rest of the run
+_memory = {}
+
+def default_probe_cache_path():
+    """Cache location from PLEX_DP_PROBE_CACHE or the user cache directory (None = disabled)"""
+    value = os.environ.get(PROBE_CACHE_ENV)
+    if value is not None:
+        return Path(value).expanduser() if value else None
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'plex-directplay-convert' / 'probe.sqlite'
+
+def open_probe_cache(cache_path: Path = None, refresh: bool = False):
+    """Select the cache database for this process (None = default location)
+    
+    With refresh, every file is probed again once; results of this run are reused.
+    """
+    global _cache_path, _configured, _refresh
+    if _configured:
+        flush_probe_cache()
+    _cache_path = Path(cache_path) if cache_path else default_probe_cache_path()
+    _configured = True
+    _refresh = refresh
+    _refreshed.clear()
+    return _connection()
+
+def probe_cache_path():
+    """Database file used by this process (None = disabled)"""
+    if not _configured:
+        open_probe_cache()
+    return _cache_path
+
+def probe_cache_refreshing():
+    """Whether stored results are currently ignored"""
+    return _refresh
+
+def _connection():
+    """Per-thread connection; None if the cache is disabled or unusable"""
+    if not _configured:
+        open_probe_cache()
+    if _cache_path is None:
+        return None
+    pid = os.getpid()
+    if getattr(_local, 'pid', None) == pid and getattr(_local, 'path', None) == _cache_path:
+        return _local.conn
+    conn = None
+    try:
+        _cache_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(_cache_path), timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(_SCHEMA)
+        if conn.execute('PRAGMA user_version').fetchone()[0] < _CACHE_VERSION:
+            # Version 1 stored garbage language tags from the MP4 fast path
+            conn.execute('DELETE FROM probe')
+            conn.execute(f'PRAGMA user_version={_CACHE_VERSION}')
+    except (OSError, sqlite3.Error):
+        # Caching is best effort: fall back to probing every time
+        conn = None
+    _local.pid, _local.path, _local.conn = pid, _cache_path, conn
+    return conn
+
+def lookup_probe(path: Path, st: os.stat_result):
+    """Return cached (streams, duration) for an unchanged file, else None"""
+    key = str(path)
+    if _refresh and key not in _refreshed:
+        return None
+    pending = _pending.get(key) or _memory.get(key)
+    if pending is not None:
+        if pending[1] == st.st_size and pending[2] == st.st_mtime_ns:
+            return _json_loads(pending[3]), pending[4]
+        return None
+    conn = _connection()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute(
+            'SELECT streams_json, duration FROM probe WHERE path=? AND size=? AND mtime_ns=?',
+            (key, st.st_size, st.st_mtime_ns)
+        ).fetchone()
+        if row is None:
+            return None
+        return _json_loads(row[0]), row[1]
+    except (sqlite3.Error, ValueError):
+        return None
+
+def store_probe(path: Path, st: os.stat_result, streams: list, duration):
+    """Remember the probe result for the given file state (written in batches)"""
+    key = str(path)
+    if _refresh:
+        _refreshed.add(key)
+    entry = (key, st.st_size, st.st_mtime_ns, _json_dumps(streams), duration)
+    if probe_cache_path() is None:
+        _memory[key] = entry
+        return
+    with _pending_lock:
+        _pending[key] = entry
+        full = len(_pending) >= _PENDING_BATCH_SIZE
+    if full:
+        flush_probe_cache()
+
+def flush_probe_cache():
+    """Write all buffered probe results in a single transaction"""
+    global _pending
+    with _pending_lock:
+        if not _pending:
+            return
+        rows, _pending = list(_pending.values()), {}
+    conn = _connection()
+    if conn is None:
+        # Database unusable: keep the results for the rest of the run at least
+        _memory.update((row[0], row) for row in rows)
+        return
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany(
+            'INSERT OR REPLACE INTO probe (path, size, mtime_ns, streams_json, duration) VALUES (?, ?, ?, ?, ?)',
+            rows
+        )
+        conn.execute('COMMIT')
+    except sqlite3.Error:
+        # Lost entries are simply probed again next time
+        try:
+            conn.execute('ROLLBACK')
+        except sqlite3.Error:
+            pass
+
+atexit.register(flush_probe_cache)
@@ -2,10 +2,14 @@
 Main file processing logic
 """
 
+import os
+import shlex
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from .media_analyzer import discover_media, discover_media_pydantic, needs_processing
+from .media_analyzer import discover_media, media_info_from_discovery, needs_processing
 from .ffmpeg_runner import get_duration, run
-from .ffmpeg_builder import build_ffmpeg_cmd
+from .ffmpeg_builder import build_ffmpeg_cmd, uses_hw_tone_mapping
 from .file_utils import display_file_path, display_file_info, handle_temp_file_cleanup
 from .language_utils import Action
 from .cache_manager import update_cache_entry
@@ -15,53 +19,187 @@ def ask_user_confirmation():
     """Ask user for confirmation with options"""
     return rich_output.ask_confirmation("Fortfahren?")
 
+def _remove_partial_output(out_path: Path, label: str):
+    """Delete the convert file left behind by an interrupted or failed ffmpeg run"""
+    try:
+        if os.path.lexists(out_path):
+            out_path.unlink()
+            rich_output.print_info(f"{label} convert Datei entfernt: {out_path.name}")
+    except Exception as cleanup_e:
+        rich_output.print_warning(f"Konnte {label.lower()} convert Datei nicht entfernen: {cleanup_e}")
+
+def _finalize_output(src: Path, out_path: Path, final_path: Path) -> bool:
+    """Replace the original with the finished convert file; False on failure"""
+    try:
+        # Remove original file
+        src.unlink()
+        rich_output.print_info(f'Originaldatei gelöscht: {src.name}')
+        
+        # Rename convert file to final name (replaces an existing file, also on Windows)
+        os.replace(out_path, final_path)
+        rich_output.print_info(f'Datei umbenannt: {out_path.name} -> {final_path.name}')
+    except Exception as e:
+        rich_output.print_error(f'Fehler beim Umbenennen der Dateien: {e}')
+        # If rename failed, try to restore original state
+        if not os.path.lexists(src) and os.path.lexists(out_path):
+            try:
+                out_path.unlink()
+                rich_output.print_info(f'Temporäre Datei entfernt: {out_path.name}')
+            except:
+                pass
+        return False
+    return True
+
+# Deferred finalizing: the delete/rename of one file runs in a background thread
+# while the batch probes and encodes the next one; at most one step is in flight
+_finalize_pool = None
+_finalize_pending = None
+# Resolved source/convert/final paths of the in-flight step
+_finalize_pending_paths = frozenset()
+_finalize_failures = 0
+
+def _finalize_job(src: Path, out_path: Path, final_path: Path, cache_path: Path) -> bool:
+    """Finalize one converted file and mark it in the cache"""
+    if not _finalize_output(src, out_path, final_path):
+        return False
+    if cache_path:
+        update_cache_entry(cache_path, str(src))
+    return True
+
+def _collect_finalize():
+    """Wait for the in-flight finalize step and record its outcome"""
+    global _finalize_pending, _finalize_pending_paths, _finalize_failures
+    if _finalize_pending is None:
+        return
+    try:
+        ok = _finalize_pending.result()
+    except Exception as e:
+        rich_output.print_error(f'Fehler beim Abschließen der Datei: {e}')
+        ok = False
+    _finalize_pending = None
+    _finalize_pending_paths = frozenset()
+    if not ok:
+        _finalize_failures += 1
+
+def _submit_finalize(src: Path, out_path: Path, final_path: Path, cache_path: Path):
+    """Queue the finalize step of a converted file behind the previous one"""
+    global _finalize_pool, _finalize_pending, _finalize_pending_paths
+    _collect_finalize()
+    if _finalize_pool is None:
+        _finalize_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='finalize')
+    _finalize_pending_paths = frozenset(map(os.path.realpath, (src, out_path, final_path)))
+    _finalize_pending = _finalize_pool.submit(_finalize_job, src, out_path, final_path, cache_path)
+
+def _wait_for_conflicting_finalize(*paths):
+    """Finish the in-flight finalize step first if it touches any of paths
+    
+    E.g. movie.avi and movie.mkv share convert.movie.mp4 and movie.mp4.
+    """
+    if _finalize_pending is not None and not _finalize_pending_paths.isdisjoint(map(os.path.realpath, paths)):
+        _collect_finalize()
+
+def wait_for_finalize() -> int:
+    """Finish deferred finalize steps; returns how many of them failed since the last call"""
+    global _finalize_failures
+    _collect_finalize()
+    failures, _finalize_failures = _finalize_failures, 0
+    return failures
+
+def iter_probed(files, lookahead: int = 2, file_stats: dict = None):
+    """Yield (path, discover_media() result or None) while the next files are probed in the background
+    
+    Together with defer_finalize this pipelines a sequential batch: the encode of
+    one file overlaps with probing the next and finalizing the previous one.
+    None means the probe failed; process_file then probes again and reports it.
+    file_stats optionally maps paths to stat results the caller already has.
+    """
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='probe')
+    queued = deque()
+    files = iter(files)
+    file_stats = file_stats or {}
+    try:
+        for path in files:
+            queued.append((path, pool.submit(discover_media, path, file_stats.get(path))))
+            if len(queued) > lookahead:
+                break
+        while queued:
+            path, future = queued.popleft()
+            try:
+                info = future.result()
+            except Exception:
+                info = None
+            next_path = next(files, None)
+            if next_path is not None:
+                queued.append((next_path, pool.submit(discover_media, next_path, file_stats.get(next_path))))
+            yield path, info
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _run_with_progress(cmd, duration):
+    """Run ffmpeg under a Rich progress bar; returns run()'s (code, stdout, stderr)"""
+    progress = rich_output.create_progress_bar(duration)
+    
+    with progress:
+        task_id = progress.add_task("Processing video...", total=duration if duration else None)
+        return run(cmd, show_progress=True, duration=duration,
+                   progress_callback=lambda current: progress.update(task_id, completed=current))
+
 def process_file(src: Path, dst_dir: Path, crf: int, preset: str, dry_run: bool, interactive: bool = False, 
                 auto_yes: bool = False, debug: bool = False, keep_languages: list = None, sort_languages: list = None,
                 gpu_info: dict = None, use_gpu: bool = False, action_filter: Action = None, delete_original: bool = False,
-                cache_path: Path = None):
-    """Process a single video file"""
-    rich_output.print_file_path(src)
+                cache_path: Path = None, precomputed_info: dict = None, threads: int = None,
+                defer_finalize: bool = False):
+    """Process a single video file
     
-    # Use Pydantic model for better validation
-    try:
-        media_info = discover_media_pydantic(src)
-    except Exception as e:
-        rich_output.print_error(f"Failed to analyze {src}: {e}")
-        return 'error', auto_yes
+    With defer_finalize the original is replaced in the background; the caller
+    must call wait_for_finalize() and count its failures as errors.
+    """
+    # Everything up to the decision goes out in one terminal write instead of one
+    # per line, so output of consecutive files does not flicker the batch progress bar
+    with rich_output.grouped():
+        rich_output.print_file_path(src)
     
-    if not media_info.has_video:
-        rich_output.print_warning(f'Kein Video: {src}')
-        return 'skipped', auto_yes
+        # Probe once (streams + duration) unless the caller already did, and derive the Pydantic model from it
+        try:
+            info = precomputed_info if precomputed_info is not None else discover_media(src)
+            media_info = media_info_from_discovery(src, info)
+        except Exception as e:
+            rich_output.print_error(f"Failed to analyze {src}: {e}")
+            return 'error', auto_yes
     
-    # Keep backward compatibility
-    info = discover_media(src)
+        if not info['has_video']:
+            rich_output.print_warning(f'Kein Video: {src}')
+            return 'skipped', auto_yes
 
-    final_name = src.stem + '.mp4'
-    out_name = 'convert.' + final_name
-    out_path = (dst_dir / out_name).resolve()
-    final_path = (dst_dir / final_name).resolve()
+        final_name = src.stem + '.mp4'
+        out_name = 'convert.' + final_name
+        # Resolve the target directory once; both output names live in it
+        dst_resolved = Path(os.path.realpath(dst_dir))
+        out_path = dst_resolved / out_name
+        final_path = dst_resolved / final_name
     
-    # Get duration for progress monitoring
-    duration = get_duration(src)
-    mode = needs_processing(info, 'mp4')
-
-    # Build command for debug display
-    debug_cmd = None
-    if debug or (interactive and debug):
-        debug_cmd = build_ffmpeg_cmd(src, out_path, mode, crf, preset, info.get('is_hdr', False), 
-                                   info, keep_languages, sort_languages, gpu_info, use_gpu)
+        # Duration for progress monitoring comes with the probe result
+        duration = info['duration'] if 'duration' in info else get_duration(src)
+        mode = needs_processing(info, 'mp4')
+
+        # Build command for debug display
+        debug_cmd = None
+        if debug or (interactive and debug):
+            debug_cmd = build_ffmpeg_cmd(src, out_path, mode, crf, preset, info.get('is_hdr', False), 
+                                       info, keep_languages, sort_languages, gpu_info, use_gpu, threads)
     
-    # Check action filter - skip file if it doesn't match the filter
-    if action_filter and mode != action_filter:
-        rich_output.print_skipped("Filtered out by action filter")
-        return 'filtered', auto_yes
+        # Check action filter - skip file if it doesn't match the filter
+        if action_filter and mode != action_filter:
+            rich_output.print_skipped("Filtered out by action filter")
+            return 'filtered', auto_yes
 
-    # Use rich output for file info display
-    rich_output.print_file_info(media_info, mode, out_path, debug_cmd, gpu_info)
+        # Use rich output for file info display
+        rich_output.print_file_info(media_info, mode, out_path,
+                                    shlex.join(debug_cmd) if debug_cmd else None, gpu_info)
 
-    if mode == Action.SKIP:
-        rich_output.print_skipped("Already compatible")
-        return 'skipped', auto_yes
+        if mode == Action.SKIP:
+            rich_output.print_skipped("Already compatible")
+            return 'skipped', auto_yes
 
     user_choice = 'yes'
     if interactive and not auto_yes:
@@ -82,69 +220,48 @@ def process_file(src: Path, dst_dir: Path, crf: int, preset: str, dry_run: bool,
     # Create output directory if it doesn't exist
     dst_dir.mkdir(parents=True, exist_ok=True)
 
+    # The previous file's rename must not race with this file's ffmpeg run or the check below
+    _wait_for_conflicting_finalize(src, out_path, final_path)
+    
     # Check if final output file already exists and warn user
-    if final_path.exists():
+    if os.path.exists(final_path):
         rich_output.print_warning(f"Output-Datei wird überschrieben: {final_path}")
 
-    rich_output.print_processing_start(out_path.name)
-    cmd = build_ffmpeg_cmd(src, out_path, mode, crf, preset, info.get('is_hdr', False), 
-                          info, keep_languages, sort_languages, gpu_info, use_gpu)
+    rich_output.print_processing_start(out_name)
+    # Same arguments as the debug display, so reuse that command if it was built
+    cmd = debug_cmd if debug_cmd is not None else build_ffmpeg_cmd(
+        src, out_path, mode, crf, preset, info.get('is_hdr', False),
+        info, keep_languages, sort_languages, gpu_info, use_gpu, threads)
     
     if not cmd:
         rich_output.print_error("Kein FFmpeg-Befehl erstellt")
         return 'error', auto_yes
-    # Create progress bar for FFmpeg processing
-    progress = rich_output.create_progress_bar(duration)
+    ret, out, err = _run_with_progress(cmd, duration)
     
-    with progress:
-        task_id = progress.add_task("Processing video...", total=duration if duration else None)
-        ret, out, err = run(cmd, show_progress=True, duration=duration, progress_callback=lambda current: progress.update(task_id, completed=current))
+    is_hdr = info.get('is_hdr', False)
+    if ret not in (0, 130) and uses_hw_tone_mapping(mode, is_hdr, gpu_info, use_gpu):
+        # The device works (checked at detection), but e.g. NVDEC may not decode this source
+        rich_output.print_warning("GPU-Tonemapping fehlgeschlagen, wiederhole mit Software-Tonemapping")
+        cmd = build_ffmpeg_cmd(src, out_path, mode, crf, preset, is_hdr, info, keep_languages, sort_languages,
+                               dict(gpu_info, tonemap_filter=None), use_gpu, threads)
+        ret, out, err = _run_with_progress(cmd, duration)
     
     if ret == 130:  # Interrupted
         rich_output.print_interrupted("Verarbeitung unterbrochen")
-        # Clean up partial convert file
-        try:
-            if out_path.exists():
-                out_path.unlink()
-                rich_output.print_info(f"Partielle convert Datei entfernt: {out_path.name}")
-        except Exception as cleanup_e:
-            rich_output.print_warning(f"Konnte partielle convert Datei nicht entfernen: {cleanup_e}")
+        _remove_partial_output(out_path, "Partielle")
         return 'interrupted', auto_yes
     elif ret != 0:
         rich_output.print_error(f"Fehler bei FFmpeg (Exit-Code: {ret})", err)
-        # Clean up failed convert file
-        try:
-            if out_path.exists():
-                out_path.unlink()
-                rich_output.print_info(f"Fehlgeschlagene convert Datei entfernt: {out_path.name}")
-        except Exception as cleanup_e:
-            rich_output.print_warning(f"Konnte fehlgeschlagene convert Datei nicht entfernen: {cleanup_e}")
+        _remove_partial_output(out_path, "Fehlgeschlagene")
         return 'error', auto_yes
 
     rich_output.print_success("Verarbeitung abgeschlossen!")
 
-    # Handle file renaming: remove original and rename convert file
-    try:
-        # Remove original file
-        src.unlink()
-        rich_output.print_info(f'Originaldatei gelöscht: {src.name}')
-        
-        # Rename convert file to final name
-        out_path.rename(final_path)
-        rich_output.print_info(f'Datei umbenannt: {out_path.name} -> {final_path.name}')
-    except Exception as e:
-        rich_output.print_error(f'Fehler beim Umbenennen der Dateien: {e}')
-        # If rename failed, try to restore original state
-        if not src.exists() and out_path.exists():
-            try:
-                out_path.unlink()
-                rich_output.print_info(f'Temporäre Datei entfernt: {out_path.name}')
-            except:
-                pass
-        return 'error', auto_yes
+    if defer_finalize:
+        _submit_finalize(src, out_path, final_path, cache_path)
+        return 'processed', auto_yes
 
-    # Update cache if provided
-    if cache_path:
-        update_cache_entry(cache_path, str(src))
+    if not _finalize_job(src, out_path, final_path, cache_path):
+        return 'error', auto_yes
 
     return 'processed', auto_yes
\ No newline at end of file
@@ -2,8 +2,10 @@
 Rich console output and progress tracking
 """
 
+import io
 import time
-from typing import Optional, Dict, Any
+from contextlib import contextmanager, redirect_stdout
+from typing import Optional, Dict, Any, Final, Mapping
 from pathlib import Path
 from rich.console import Console
 from rich.progress import (
@@ -23,6 +25,57 @@ from .language_utils import Action
 # Global console instance
 console = Console()
 
+# Accepted answers (German and English) for ask_confirmation()
+_CHOICES = {
+    'j': 'yes', 'ja': 'yes', 'y': 'yes', 'yes': 'yes',
+    'n': 'no', 'nein': 'no', 'no': 'no',
+    'a': 'all', 'alle': 'all', 'all': 'all',
+    'q': 'quit', 'quit': 'quit', 'exit': 'quit',
+}
+
+_ACTION_DESCRIPTIONS: Final[Mapping[Action, str]] = {
+    Action.SKIP: "[green]✓ Already compatible[/green]",
+    Action.CONTAINER_REMUX: "[yellow]Container remux to MP4[/yellow]",
+    Action.REMUX_AUDIO: "[yellow]Audio remux to stereo AAC[/yellow]",
+    Action.TRANCODE_VIDEO: "[orange3]Video transcode to H.264 SDR[/orange3]",
+    Action.TRANCODE_ALL: "[red]Full transcode (video + audio)[/red]"
+}
+
+_PLATFORM_ICONS: Final[Mapping[str, str]] = {'metal': '🔥', 'nvidia': '🟢', 'intel': '🔵', 'amd': '🔴'}
+
+# Status line styles; messages are printed as Text so they skip the markup parser
+# (and file names containing [brackets] are printed verbatim)
+_SUCCESS = "bold green"
+_ERROR = "bold red"
+_WARNING = "bold yellow"
+_INFO = "bold cyan"
+_PROCESSING_PREFIX = Text("Processing: ", style="bold cyan")
+
+def _status(icon: str, message: str, style: str) -> Text:
+    """Single styled status line"""
+    return Text(f"{icon} {message}", style=style)
+
+def _summary_table(label: str, value_label: str, label_width: Optional[int] = None,
+                   justify: str = "left") -> Table:
+    """Empty two-column table in the style shared by all summaries"""
+    table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
+    table.add_column(label, style="cyan", width=label_width)
+    table.add_column(value_label, style="white", justify=justify)
+    return table
+
+class _RecordingWriter(io.TextIOBase):
+    """stdout replacement that appends plain print() output to a recording console"""
+    
+    def __init__(self, recorder: Console):
+        self._recorder = recorder
+    
+    def writable(self):
+        return True
+    
+    def write(self, text):
+        self._recorder.out(text, end='', highlight=False)
+        return len(text)
+
 class RichOutput:
     """Rich console output manager"""
     
@@ -30,6 +83,31 @@ class RichOutput:
         self.console = console
         self.current_progress: Optional[Progress] = None
     
+    @contextmanager
+    def capture(self):
+        """Record all output into a buffer instead of the terminal (for worker processes)
+        
+        Plain print() calls are recorded too, so nothing of a worker reaches the
+        terminal past the parent's progress bar.
+        """
+        recorder = Console(file=io.StringIO(), record=True, color_system='truecolor',
+                           width=self.console.width)
+        previous, self.console = self.console, recorder
+        try:
+            with redirect_stdout(_RecordingWriter(recorder)):
+                yield recorder
+        finally:
+            self.console = previous
+    
+    def grouped(self):
+        """Context manager that buffers output and writes it in one piece on exit"""
+        return self.console
+    
+    def print_captured(self, text: str):
+        """Replay output recorded by capture() in another process"""
+        if text:
+            self.console.print(Text.from_ansi(text), end='')
+    
     def print_header(self, title: str):
         """Print application header"""
         self.console.print(Panel.fit(
@@ -40,15 +118,13 @@ class RichOutput:
     
     def print_file_path(self, path: Path):
         """Print file path being processed"""
-        self.console.print(f"\n[bold cyan]Processing:[/bold cyan] {path}")
+        self.console.print(Text("\n").append_text(_PROCESSING_PREFIX).append(str(path)))
     
     def print_file_info(self, media_info: MediaInfo, action: Action, 
                        output_path: Optional[Path] = None, debug_cmd: Optional[str] = None,
                        gpu_info: Optional[Dict] = None):
         """Print detailed file information in a formatted table"""
-        table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
-        table.add_column("Property", style="cyan", width=20)
-        table.add_column("Value", style="white")
+        table = _summary_table("Property", "Value", label_width=20)
         
         # File info
         table.add_row("File Path", str(media_info.file_path))
@@ -75,14 +151,7 @@ class RichOutput:
             table.add_row("Audio Codecs", "[red]None[/red]")
         
         # Action needed
-        action_descriptions = {
-            Action.SKIP: "[green]✓ Already compatible[/green]",
-            Action.CONTAINER_REMUX: "[yellow]Container remux to MP4[/yellow]",
-            Action.REMUX_AUDIO: "[yellow]Audio remux to stereo AAC[/yellow]",
-            Action.TRANCODE_VIDEO: "[orange3]Video transcode to H.264 SDR[/orange3]",
-            Action.TRANCODE_ALL: "[red]Full transcode (video + audio)[/red]"
-        }
-        table.add_row("Action Needed", action_descriptions.get(action, str(action)))
+        table.add_row("Action Needed", _ACTION_DESCRIPTIONS.get(action, str(action)))
         
         # Output path
         if output_path:
@@ -98,14 +167,14 @@ class RichOutput:
         # Debug command if available
         if debug_cmd:
             self.console.print(Panel(
-                debug_cmd,
+                Text(debug_cmd),
                 title="[bold yellow]FFmpeg Command[/bold yellow]",
                 border_style="yellow"
             ))
     
     def print_processing_start(self, output_name: str):
         """Print processing start message"""
-        self.console.print(f"\n[bold green]Creating:[/bold green] {output_name}")
+        self.console.print(Text("\n").append("Creating: ", style="bold green").append(output_name))
         self.console.print("[bold yellow]Processing started...[/bold yellow]")
     
     def create_progress_bar(self, total_duration: Optional[float] = None) -> Progress:
@@ -147,35 +216,34 @@ class RichOutput:
     
     def print_success(self, message: str = "Processing completed!"):
         """Print success message"""
-        self.console.print(f"[bold green]✓ {message}[/bold green]")
+        self.console.print(_status("✓", message, _SUCCESS))
     
     def print_error(self, message: str, details: Optional[str] = None):
         """Print error message"""
-        self.console.print(f"[bold red]✗ {message}[/bold red]")
+        self.console.print(_status("✗", message, _ERROR))
         if details:
-            self.console.print(f"[red]Details: {details}[/red]")
+            self.console.print(Text(f"Details: {details}", style="red"))
     
     def print_warning(self, message: str):
         """Print warning message"""
-        self.console.print(f"[bold yellow]⚠ {message}[/bold yellow]")
+        self.console.print(_status("⚠", message, _WARNING))
     
     def print_info(self, message: str):
         """Print info message"""
-        self.console.print(f"[bold cyan]ℹ {message}[/bold cyan]")
+        self.console.print(_status("ℹ", message, _INFO))
     
     def print_skipped(self, reason: str = "Skipped"):
         """Print skip message"""
-        self.console.print(f"[bold yellow]⏭ {reason}[/bold yellow]")
+        self.console.print(_status("⏭", reason, _WARNING))
     
     def print_interrupted(self, message: str = "Processing interrupted"):
         """Print interruption message"""
-        self.console.print(f"\n[bold red]⏹ {message}[/bold red]")
+        self.console.print(Text("\n").append_text(_status("⏹", message, _ERROR)))
     
     def print_gpu_info(self, gpu_info: Dict):
         """Print GPU acceleration info"""
         if gpu_info.get('available'):
-            platform_icons = {'metal': '🔥', 'nvidia': '🟢', 'intel': '🔵'}
-            icon = platform_icons.get(gpu_info['platform'], '⚡')
+            icon = _PLATFORM_ICONS.get(gpu_info['platform'], '⚡')
             self.console.print(f"{icon} [bold green]GPU acceleration detected:[/bold green] "
                              f"{gpu_info['platform'].title()} ({gpu_info['encoder']})")
         else:
@@ -184,9 +252,7 @@ class RichOutput:
     def print_cache_info(self, cache_path: Path, total_files: int, 
                         processed: int, compatible: int, need_processing: int):
         """Print cache file information"""
-        table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
-        table.add_column("Category", style="cyan")
-        table.add_column("Count", style="white", justify="right")
+        table = _summary_table("Category", "Count", justify="right")
         
         table.add_row("Total Files", str(total_files))
         table.add_row("Already Processed", f"[green]{processed}[/green]")
@@ -205,9 +271,7 @@ class RichOutput:
         status_color = "green" if stats.interrupted_files == 0 else "yellow"
         title = "Processing Complete" if stats.interrupted_files == 0 else "Processing Interrupted"
         
-        table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
-        table.add_column("Metric", style="cyan")
-        table.add_column("Count", style="white", justify="right")
+        table = _summary_table("Metric", "Count", justify="right")
         
         table.add_row("Total Files", str(stats.total_files))
         table.add_row("Converted", f"[green]{stats.converted_files}[/green]")
@@ -236,17 +300,10 @@ class RichOutput:
         self.console.print(f"{prompt} {options_text}")
         
         while True:
-            choice = input().lower().strip()
-            if choice in ['j', 'ja', 'y', 'yes']:
-                return 'yes'
-            elif choice in ['n', 'nein', 'no']:
-                return 'no'
-            elif choice in ['a', 'alle', 'all']:
-                return 'all'
-            elif choice in ['q', 'quit', 'exit']:
-                return 'quit'
-            else:
-                self.console.print("[red]Please enter: y/n/a/q[/red]")
+            choice = _CHOICES.get(input().lower().strip())
+            if choice is not None:
+                return choice
+            self.console.print("[red]Please enter: y/n/a/q[/red]")
 
 # Global rich output instance
 rich_output = RichOutput()
\ No newline at end of file
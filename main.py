@@ -19,24 +19,15 @@ Requires: ffmpeg, ffprobe in PATH
 """
 
 import argparse
-import shutil
+import functools
 import sys
-from datetime import datetime
 from pathlib import Path
 
-# Import our modular components
-from lib.ffmpeg_runner import setup_signal_handlers, interrupted
 from lib.language_utils import normalize_language, Action
-from lib.gpu_utils import detect_gpu_acceleration
-from lib.cache_manager import read_cache_csv, gather_files_to_cache
-from lib.processor import process_file
-from lib.file_utils import VIDEO_EXTS
-from lib.rich_console import rich_output
-from lib.models import ProcessingConfig, BatchProcessingStats
-from lib.parallel_processor import create_parallel_processor
 
-def parse_arguments():
-    """Parse and validate command line arguments"""
+@functools.lru_cache(maxsize=1)
+def _build_parser():
+    """Build the command line parser (once, on first use)"""
     ap = argparse.ArgumentParser(description='Plex Direct Play Konverter für Apple TV 4K (3. Gen)')
     ap.add_argument('root', type=Path, help='Wurzelverzeichnis (rekursiv) oder einzelne Datei')
     ap.add_argument('--out', type=Path, default=None, help='Zielordner (Standard: in-place neben Original)')
@@ -49,13 +40,23 @@ def parse_arguments():
                     help='x264 Encoding Preset - schneller = größere Datei (Standard: medium)')
     ap.add_argument('--use-gpu', action='store_true',
                     help='GPU-Beschleunigung verwenden (Mac Metal / Windows NVIDIA)')
+    ap.add_argument('--refresh-gpu', action='store_true',
+                    help='Gespeicherte GPU-Erkennung ignorieren und neu prüfen (mit --use-gpu)')
     
     # Operation modes
     ap.add_argument('--dry-run', action='store_true', help='Nur zeigen, was passieren würde')
     ap.add_argument('--interactive', '-i', action='store_true', help='Interaktiver Modus: Zeigt Details und fragt nach Bestätigung')
     ap.add_argument('--debug', action='store_true', help='Debug-Modus: Zeigt ffmpeg-Befehl in interaktivem Modus')
     ap.add_argument('--gather', '-g', type=Path, help='Sammelmodus: Analysiert alle Dateien und speichert Informationen in CSV-Datei')
+    ap.add_argument('--gather-and-process', type=Path,
+                    help='Dateien in einem Durchlauf verarbeiten und dabei die Analyse in diese CSV-Datei schreiben')
     ap.add_argument('--delete-original', action='store_true', help='Originaldatei nach erfolgreicher Konvertierung löschen')
+    ap.add_argument('--jobs', '-j', type=int, default=None,
+                    help='Anzahl paralleler ffprobe-Analysen im Sammelmodus (Standard: Anzahl CPU-Kerne)')
+    ap.add_argument('--refresh-cache', action='store_true',
+                    help='Gespeicherte Analyse-Ergebnisse (ffprobe-Cache, CSV-Zeilen) ignorieren und alle Dateien neu analysieren')
+    ap.add_argument('--workers', '-w', type=int, default=1,
+                    help='Anzahl gleichzeitiger ffmpeg-Konvertierungen; CPU-Threads werden aufgeteilt (Standard: 1)')
     
     # Language handling
     ap.add_argument('--keep-languages', type=str, help='Sprachen beibehalten (Komma-getrennt, z.B. de,en,jp)')
@@ -66,26 +67,40 @@ def parse_arguments():
     ap.add_argument('--limit', type=int, help='Nur die nächsten N Dateien verarbeiten (überspringt bereits kompatible)')
     ap.add_argument('--use-cache', type=Path, help='Verwende existierende Cache-Datei für Verarbeitung statt neue Analyse')
     
-    args = ap.parse_args()
+    return ap
+
+def parse_arguments():
+    """Parse and validate command line arguments"""
+    args = _build_parser().parse_args()
     
     # Validate arguments
     if not 0 <= args.crf <= 51:
         print('Fehler: CRF muss zwischen 0 und 51 liegen', file=sys.stderr)
         sys.exit(2)
     
+    if args.jobs is not None and args.jobs < 1:
+        print('Fehler: --jobs muss mindestens 1 sein', file=sys.stderr)
+        sys.exit(2)
+    
+    if args.workers < 1:
+        print('Fehler: --workers muss mindestens 1 sein', file=sys.stderr)
+        sys.exit(2)
+    
+    if args.gather_and_process and (args.gather or args.use_cache):
+        print('Fehler: --gather-and-process kann nicht mit --gather oder --use-cache kombiniert werden', file=sys.stderr)
+        sys.exit(2)
+    
     return args
 
+def _parse_language_list(value):
+    """Split a comma-separated language option into interned, normalized codes"""
+    if not value:
+        return []
+    return [sys.intern(normalize_language(lang.strip())) for lang in value.split(',')]
+
 def parse_language_arguments(args):
     """Parse and normalize language arguments"""
-    keep_languages = []
-    if args.keep_languages:
-        keep_languages = [normalize_language(lang.strip()) for lang in args.keep_languages.split(',')]
-    
-    sort_languages = []
-    if args.sort_languages:
-        sort_languages = [normalize_language(lang.strip()) for lang in args.sort_languages.split(',')]
-    
-    return keep_languages, sort_languages
+    return _parse_language_list(args.keep_languages), _parse_language_list(args.sort_languages)
 
 def parse_action_filter(action_filter_arg):
     """Parse and validate action filter argument"""
@@ -103,239 +118,15 @@ def parse_action_filter(action_filter_arg):
         sys.exit(2)
     return valid_actions[action_filter_arg]
 
-def setup_gpu_acceleration(use_gpu):
-    """Setup and detect GPU acceleration if requested"""
-    if not use_gpu:
-        return None
-        
-    gpu_info = detect_gpu_acceleration()
-    rich_output.print_gpu_info(gpu_info)
-    
-    return gpu_info
-
-def update_processing_counters(result, counters):
-    """Update processing result counters based on file processing result"""
-    if result in ('converted', 'processed'):
-        counters['converted'] += 1
-    elif result in ('skipped', 'planned', 'filtered'):
-        counters['skipped'] += 1
-    elif result in ('remuxed',):
-        counters['remuxed'] += 1
-    elif result in ('interrupted',):
-        counters['interrupted'] += 1
-        return True  # Signal to break processing loop
-    elif result == 'quit':
-        return True  # Signal to break processing loop
-    else:
-        counters['errors'] += 1
-    return False  # Continue processing
-
-def collect_video_files(root_path):
-    """Collect all video files from a directory"""
-    video_files = []
-    for ext in VIDEO_EXTS:
-        video_files.extend(root_path.rglob(f'*{ext}'))
-        video_files.extend(root_path.rglob(f'*{ext.upper()}'))
-    
-    # Remove duplicates and filter for actual files
-    return list(set([p for p in video_files if p.is_file()]))
-
-def filter_cache_files(file_data_list, action_filter):
-    """Filter cache files that need processing"""
-    files_to_process = []
-    
-    for entry in file_data_list:
-        file_path = Path(entry['file_path'])
-        
-        # Skip if file doesn't exist
-        if not file_path.exists():
-            continue
-            
-        # Skip if already processed
-        if entry.get('processed', False):
-            continue
-        
-        # Skip if already compatible (unless action filter requires it)
-        if entry.get('direct_play_compatible', False) and not action_filter:
-            continue
-            
-        # Apply action filter if specified
-        if action_filter:
-            action_needed = entry.get('action_needed', '')
-            filter_map = {
-                Action.CONTAINER_REMUX: 'Container remux to MP4',
-                Action.REMUX_AUDIO: 'Audio remux to stereo AAC', 
-                Action.TRANCODE_VIDEO: 'Video transcode to H.264 SDR',
-                Action.TRANCODE_ALL: 'Full transcode'
-            }
-            if not any(filter_text in action_needed for filter_text in filter_map.get(action_filter, [])):
-                continue
-        
-        files_to_process.append(file_path)
-    
-    return files_to_process
-
-def apply_limit_and_print(files_list, limit, description="Dateien"):
-    """Apply limit to files list and print information"""
-    if limit and limit > 0:
-        files_list = files_list[:limit]
-        rich_output.print_info(f"Beschränke Verarbeitung auf {len(files_list)} {description} (--limit {limit})")
-    return files_list
-
-def process_files_batch(files, out_dir, cache_path, args, keep_languages, sort_languages, gpu_info, counters, action_filter=None):
-    """Process a batch of files and update counters"""
-    auto_yes = False
-    
-    # Create batch progress bar
-    progress = rich_output.create_batch_progress()
-    
-    with progress:
-        task_id = progress.add_task("Processing files...", total=len(files))
-        
-        for file_path in files:
-            # Check for global interruption
-            if interrupted:
-                rich_output.print_interrupted("Verarbeitung unterbrochen")
-                break
-            
-            target_dir = out_dir if out_dir else file_path.parent
-            try:
-                res, auto_yes = process_file(
-                    file_path, target_dir, args.crf, args.preset, args.dry_run, args.interactive,
-                    auto_yes, args.debug, keep_languages, sort_languages, gpu_info,
-                    getattr(args, 'use_gpu', False), action_filter,
-                    args.delete_original, cache_path
-                )
-                counters['processed'] += 1
-                
-                # Update counters and check for early exit
-                should_break = update_processing_counters(res, counters)
-                if should_break:
-                    break
-                    
-            except Exception as e:
-                rich_output.print_error(f'Fehler bei {file_path}', str(e))
-                counters['errors'] += 1
-            
-            progress.update(task_id, advance=1)
-    
-    return counters
-
-def print_final_summary(counters):
-    """Print final processing summary using Rich"""
-    stats = BatchProcessingStats(
-        total_files=counters['total'],
-        processed_files=counters['processed'],
-        converted_files=counters['converted'],
-        remuxed_files=counters['remuxed'],
-        skipped_files=counters['skipped'],
-        error_files=counters['errors'],
-        interrupted_files=counters['interrupted'],
-        end_time=datetime.now()
-    )
-    rich_output.print_final_summary(stats)
-
 def main():
-    # Setup signal handlers for graceful shutdown
-    setup_signal_handlers()
-    
     # Parse and validate arguments
     args = parse_arguments()
     keep_languages, sort_languages = parse_language_arguments(args)
     action_filter = parse_action_filter(args.action_filter)
-
-    # Print application header
-    rich_output.print_header("FFmpeg Converter for Plex Direct Play")
-    
-    # Check for required tools
-    if shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None:
-        rich_output.print_error('ffmpeg/ffprobe nicht gefunden. Bitte in PATH verfügbar machen.')
-        sys.exit(2)
     
-    # Setup GPU acceleration
-    gpu_info = setup_gpu_acceleration(getattr(args, 'use_gpu', False))
-
-    root: Path = args.root
-    if not root.exists():
-        rich_output.print_error(f'Pfad existiert nicht: {root}')
-        sys.exit(2)
-
-    # Handle gather mode - analyze files and export to CSV
-    if args.gather:
-        csv_path = args.gather.resolve()
-        rich_output.print_info(f"Gathering file analysis to: {csv_path}")
-        gather_files_to_cache(root, csv_path)
-        rich_output.print_success(f"Analysis complete: {csv_path}")
-        return
-    
-    # Handle cache-based processing (only when --use-cache is specified)
-    cache_path = None
-    file_data_list = None
-    
-    if args.use_cache:
-        cache_path = args.use_cache.resolve()
-        try:
-            file_data_list = read_cache_csv(cache_path)
-            
-            # Count different file states
-            total_files = len(file_data_list)
-            already_processed = sum(1 for entry in file_data_list if entry.get('processed', False))
-            compatible_files = sum(1 for entry in file_data_list if entry.get('direct_play_compatible', False) and not entry.get('processed', False))
-            need_processing = total_files - already_processed - compatible_files
-            
-            rich_output.print_cache_info(cache_path, total_files, already_processed, compatible_files, need_processing)
-        except FileNotFoundError:
-            # Generate cache file if it doesn't exist
-            rich_output.print_warning(f"Cache-Datei nicht gefunden, erstelle neue: {cache_path}")
-            file_data_list = gather_files_to_cache(root, cache_path)
-
-    out_dir = args.out.resolve() if args.out else None
-    if out_dir:
-        out_dir.mkdir(parents=True, exist_ok=True)
-
-    # Initialize counters
-    counters = {
-        'total': 0,
-        'converted': 0,
-        'skipped': 0,
-        'errors': 0,
-        'remuxed': 0,
-        'interrupted': 0,
-        'processed': 0
-    }
-    
-    # Process files based on cache or direct processing
-    if args.use_cache:
-        files_to_process = filter_cache_files(file_data_list, action_filter)
-        files_to_process = apply_limit_and_print(files_to_process, args.limit)
-        
-        counters['total'] = len(files_to_process)
-        rich_output.print_info(f"Zu verarbeitende Dateien: {counters['total']}")
-        
-        process_files_batch(files_to_process, out_dir, cache_path, args, keep_languages, sort_languages, gpu_info, counters, action_filter)
-                
-    else:
-        # Direct processing without cache
-        if root.is_file():
-            # Single file processing
-            if root.suffix.lower() not in VIDEO_EXTS:
-                rich_output.print_error(f'{root} ist keine unterstützte Videodatei')
-                sys.exit(2)
-            
-            counters['total'] = 1
-            process_files_batch([root], out_dir, None, args, keep_languages, sort_languages, gpu_info, counters, action_filter)
-        else:
-            # Directory processing without cache
-            video_files = collect_video_files(root)
-            video_files = apply_limit_and_print(video_files, args.limit, "Videodateien")
-            
-            counters['total'] = len(video_files)
-            rich_output.print_info(f"Gefunden: {counters['total']} Videodateien")
-            
-            process_files_batch(video_files, out_dir, None, args, keep_languages, sort_languages, gpu_info, counters, action_filter)
-
-    # Final summary
-    print_final_summary(counters)
+    # Loaded only now, so --help and usage errors return without importing rich/pydantic
+    from lib.cli import run
+    run(args, keep_languages, sort_languages, action_filter)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -5,6 +5,7 @@ Uses pre-generated video files from tests/video_files/
 Run tests/generate_test_files.py first to create the video files.
 """
 
+import os
 import pytest
 import tempfile
 import shutil
@@ -80,6 +81,15 @@ def temp_dirs():
         shutil.rmtree(temp_dir)
 
 
+@pytest.fixture(scope="session", autouse=True)
+def isolated_probe_cache(temp_dirs):
+    """Keep the ffprobe result cache of the test run out of the user's cache directory"""
+    from lib import probe_cache
+    os.environ[probe_cache.PROBE_CACHE_ENV] = str(temp_dirs['temp'] / 'probe.sqlite')
+    probe_cache.open_probe_cache()
+    yield
+
+
 @pytest.fixture
 def run_converter(temp_dirs):
     """Fixture to run converter commands"""
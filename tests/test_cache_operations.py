@@ -98,6 +98,42 @@ class TestCacheGeneration:
         assert full_transcode_entry['direct_play_compatible'] == 'False'
         assert 'transcode' in full_transcode_entry['action_needed'].lower()
 
+    def test_gather_reuses_unchanged_entries(self, video_files_dir, temp_dirs, run_converter):
+        """Test that a repeated gather keeps entries of unchanged files"""
+        cache_file = temp_dirs['cache'] / 'incremental.csv'
+
+        run_converter([str(video_files_dir), '--gather', str(cache_file)])
+        with open(cache_file, 'r', newline='', encoding='utf-8') as f:
+            first_run = {entry['file_path']: entry for entry in csv.DictReader(f)}
+
+        result = run_converter([str(video_files_dir), '--gather', str(cache_file)])
+        assert 'aus Cache übernommen' in result.stdout
+
+        with open(cache_file, 'r', newline='', encoding='utf-8') as f:
+            second_run = {entry['file_path']: entry for entry in csv.DictReader(f)}
+
+        assert second_run.keys() == first_run.keys()
+        for file_path, entry in second_run.items():
+            assert entry['file_mtime_ns'] != ''
+            assert entry['analysis_date'] == first_run[file_path]['analysis_date']
+
+    def test_gather_and_process_single_pass(self, sample_files, temp_dirs, run_converter):
+        """Test that --gather-and-process writes the analysis and marks converted files"""
+        cache_file = temp_dirs['cache'] / 'single_pass.csv'
+
+        run_converter([
+            str(sample_files['remux_mkv']),
+            '--out', str(temp_dirs['output']),
+            '--gather-and-process', str(cache_file)
+        ])
+
+        with open(cache_file, 'r', newline='', encoding='utf-8') as f:
+            entries = list(csv.DictReader(f))
+
+        assert len(entries) == 1
+        assert entries[0]['container'] == 'MKV'
+        assert entries[0]['processed'] == 'True'
+
 
 class TestCacheProcessing:
     """Test --use-cache processing functionality"""
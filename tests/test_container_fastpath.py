@@ -0,0 +1,102 @@
+"""
+Test the ffprobe-free MP4 stream detection
+"""
+
+import struct
+from lib.container_fastpath import probe_mp4
+
+
+def box(box_type: bytes, *payload: bytes) -> bytes:
+    body = b''.join(payload)
+    return struct.pack('>I4s', 8 + len(body), box_type) + body
+
+
+def language(code) -> bytes:
+    """Packed mdhd language; an int is stored as is"""
+    packed = code if isinstance(code, int) else 0
+    for char in '' if isinstance(code, int) else code:
+        packed = (packed << 5) | (ord(char) - 0x60)
+    return struct.pack('>H', packed)
+
+
+def track(handler: bytes, entry: bytes, lang='und') -> bytes:
+    mdhd = box(b'mdhd', bytes(4), bytes(8), struct.pack('>II', 1000, 5000), language(lang), bytes(2))
+    hdlr = box(b'hdlr', bytes(4), bytes(4), handler, bytes(12), b'\0')
+    stsd = box(b'stsd', bytes(4), struct.pack('>I', 1), entry)
+    return box(b'trak', box(b'mdia', mdhd, hdlr, box(b'minf', box(b'stbl', stsd))))
+
+
+def avc1(primaries: int = 1, transfer: int = 1, colour: bool = True) -> bytes:
+    children = box(b'colr', b'nclx', struct.pack('>HHHB', primaries, transfer, 1, 0)) if colour else b''
+    return box(b'avc1', bytes(78), children)
+
+
+def mp4a(object_type: int = 2, channel_config: int = 2) -> bytes:
+    asc = bytes([(object_type << 3) | (4 >> 1), ((4 & 1) << 7) | (channel_config << 3)])
+    decoder_info = bytes([0x05, len(asc)]) + asc
+    decoder_config = bytes([0x04, 13 + len(decoder_info), 0x40]) + bytes(12) + decoder_info
+    es = bytes([0x03, 3 + len(decoder_config)]) + b'\0\1\0' + decoder_config
+    return box(b'mp4a', bytes(28), box(b'esds', bytes(4), es))
+
+
+def write_mp4(path, *tracks: bytes):
+    mvhd = box(b'mvhd', bytes(4), bytes(8), struct.pack('>II', 1000, 12500), bytes(80))
+    path.write_bytes(box(b'ftyp', b'isom', bytes(4)) + box(b'mdat', bytes(64)) + box(b'moov', mvhd, *tracks))
+
+
+class TestMp4FastPath:
+    """Test stream extraction from the moov box"""
+
+    def test_h264_aac_stereo(self, tmp_path):
+        """Test a plain H.264 + AAC-LC stereo file with moov after mdat"""
+        media = tmp_path / 'movie.mp4'
+        write_mp4(media, track(b'vide', avc1()), track(b'soun', mp4a(), 'ger'))
+
+        streams, duration = probe_mp4(media)
+
+        assert duration == 12.5
+        assert streams[0] == {'codec_type': 'video', 'codec_name': 'h264', 'color_primaries': 'bt709',
+                              'color_transfer': 'bt709', 'tags': {'language': 'und'}}
+        assert streams[1] == {'codec_type': 'audio', 'codec_name': 'aac', 'channels': 2,
+                              'tags': {'language': 'ger'}}
+
+    def test_hdr_and_surround(self, tmp_path):
+        """Test that PQ/BT.2020 and 5.1 channel configurations are reported"""
+        media = tmp_path / 'hdr.mp4'
+        write_mp4(media, track(b'vide', avc1(9, 16)), track(b'soun', mp4a(channel_config=6)))
+
+        streams, _ = probe_mp4(media)
+
+        assert streams[0]['color_transfer'] == 'smpte2084'
+        assert streams[0]['color_primaries'] == 'bt2020'
+        assert streams[1]['channels'] == 6
+
+    def test_special_language_codes(self, tmp_path):
+        """Test Macintosh code 0 (English) and 0x7FFF (unspecified) like ffprobe reports them"""
+        media = tmp_path / 'languages.mp4'
+        write_mp4(media, track(b'vide', avc1(), 0x7FFF), track(b'soun', mp4a(), 0))
+
+        streams, _ = probe_mp4(media)
+
+        assert 'tags' not in streams[0]
+        assert streams[1]['tags'] == {'language': 'eng'}
+
+        # Other Macintosh codes are left to ffprobe
+        write_mp4(media, track(b'vide', avc1()), track(b'soun', mp4a(), 3))
+        assert probe_mp4(media) is None
+
+    def test_falls_back_when_unsure(self, tmp_path):
+        """Test that ambiguous files are left to ffprobe"""
+        media = tmp_path / 'unsure.mp4'
+
+        write_mp4(media, track(b'vide', avc1(colour=False)), track(b'soun', mp4a()))
+        assert probe_mp4(media) is None
+
+        write_mp4(media, track(b'vide', avc1()), track(b'soun', mp4a(object_type=5)))
+        assert probe_mp4(media) is None
+
+        write_mp4(media, track(b'vide', avc1()), track(b'text', box(b'tx3g', bytes(8))))
+        assert probe_mp4(media) is None
+
+        media.write_bytes(b'not an mp4 file')
+        assert probe_mp4(media) is None
@@ -0,0 +1,41 @@
+"""
+Test ffmpeg command building
+"""
+
+from pathlib import Path
+from lib.ffmpeg_builder import build_ffmpeg_cmd
+from lib.language_utils import Action
+
+NVIDIA = {'available': True, 'encoder': 'h264_nvenc', 'decoder': 'h264_cuvid', 'platform': 'nvidia',
+          'tonemap_filter': 'tonemap_cuda'}
+
+
+def video_filter(cmd):
+    return cmd[cmd.index('-vf') + 1] if '-vf' in cmd else None
+
+
+class TestHdrToneMapping:
+    """Test the choice between hardware and software tone mapping"""
+
+    def test_cuda_tone_mapping_stays_on_gpu(self):
+        """Test that CUDA decoding is requested before the input and tonemap_cuda is used"""
+        cmd = build_ffmpeg_cmd(Path('in.mkv'), Path('out.mp4'), Action.TRANCODE_ALL, 22, 'medium',
+                               is_hdr=True, gpu_info=NVIDIA, use_gpu=True)
+
+        assert cmd[cmd.index('-hwaccel') + 1] == 'cuda'
+        assert cmd.index('-hwaccel') < cmd.index('-i')
+        assert video_filter(cmd).startswith('tonemap_cuda=')
+        assert cmd[cmd.index('-c:v') + 1] == 'h264_nvenc'
+
+    def test_software_fallback(self):
+        """Test software tone mapping without GPU, without a filter and for SDR sources"""
+        no_filter = dict(NVIDIA, tonemap_filter=None)
+        for gpu_info, use_gpu in ((NVIDIA, False), (no_filter, True)):
+            cmd = build_ffmpeg_cmd(Path('in.mkv'), Path('out.mp4'), Action.TRANCODE_VIDEO, 22, 'medium',
+                                   is_hdr=True, gpu_info=gpu_info, use_gpu=use_gpu)
+            assert '-hwaccel' not in cmd
+            assert video_filter(cmd).startswith('zscale=')
+
+        cmd = build_ffmpeg_cmd(Path('in.mkv'), Path('out.mp4'), Action.TRANCODE_ALL, 22, 'medium',
+                               is_hdr=False, gpu_info=NVIDIA, use_gpu=True)
+        assert '-hwaccel' not in cmd and video_filter(cmd) is None
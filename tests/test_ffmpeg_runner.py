@@ -0,0 +1,33 @@
+"""
+Test parsing of ffmpeg progress output
+"""
+
+from lib.ffmpeg_runner import ProgressMonitor
+
+
+class TestProgressMonitor:
+    """Test ProgressMonitor.parse_progress_line()"""
+
+    def test_out_time_sets_percent(self):
+        """Test that out_time_us updates position and percentage"""
+        progress = ProgressMonitor(100)
+
+        assert progress.parse_progress_line(b'out_time_us=25000000')
+        assert progress.current_time == 25
+        assert progress.progress_percent == 25
+
+    def test_padded_bitrate(self):
+        """Test that the space-padded bitrate of -progress output is kept without padding"""
+        progress = ProgressMonitor(100)
+
+        progress.parse_progress_line(b'bitrate= 871.2kbits/s')
+
+        assert progress.bitrate == '871.2kbits/s'
+
+    def test_speed(self):
+        """Test that the speed value is stored"""
+        progress = ProgressMonitor(100)
+
+        progress.parse_progress_line(b'speed=1.52x')
+
+        assert progress.speed == '1.52x'
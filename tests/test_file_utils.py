@@ -0,0 +1,43 @@
+"""
+Test video file discovery
+"""
+
+from lib.file_utils import iter_video_files, filter_existing, stat_existing
+
+
+class TestIterVideoFiles:
+    """Test the scandir-based directory walk"""
+
+    def test_finds_videos_and_skips_metadata_dirs(self, tmp_path):
+        """Test case-insensitive matching and skipping of hidden/NAS directories"""
+        (tmp_path / 'Season 1').mkdir()
+        (tmp_path / 'Season 1' / 'e01.MKV').write_bytes(b'')
+        (tmp_path / 'movie.mp4').write_bytes(b'')
+        (tmp_path / 'notes.txt').write_bytes(b'')
+        for skipped in ('.AppleDouble', '@eaDir', '#recycle'):
+            (tmp_path / skipped).mkdir()
+            (tmp_path / skipped / 'movie.mkv').write_bytes(b'')
+
+        found = sorted(p.relative_to(tmp_path).as_posix() for p in iter_video_files(tmp_path))
+
+        assert found == ['Season 1/e01.MKV', 'movie.mp4']
+
+    def test_filter_existing_keeps_order(self, tmp_path):
+        """Test that the chunked, threaded existence check preserves input order"""
+        paths = []
+        for i in range(600):
+            path = tmp_path / f'{i}.mkv'
+            if i % 3:
+                path.write_bytes(b'')
+            paths.append(str(path))
+
+        assert filter_existing(paths) == [p for i, p in enumerate(paths) if i % 3]
+
+    def test_stat_existing_returns_stat_results(self, tmp_path):
+        """Test that the stat results of existing paths are handed back"""
+        media = tmp_path / 'movie.mkv'
+        media.write_bytes(b'x' * 7)
+
+        found = stat_existing([str(media), str(tmp_path / 'gone.mkv')])
+
+        assert [(p, st.st_size) for p, st in found] == [(str(media), 7)]
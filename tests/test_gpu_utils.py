@@ -0,0 +1,70 @@
+"""
+Test the stored GPU detection result
+"""
+
+import subprocess
+from lib import gpu_utils
+
+
+class TestGpuDetectionCache:
+    """Test reuse of the GPU detection across runs"""
+
+    def test_stored_result_is_reused_until_refresh(self, tmp_path, monkeypatch):
+        """Test that a new run reads the stored result instead of asking ffmpeg again"""
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+        probes = []
+        nvidia = {'available': True, 'encoder': 'h264_nvenc', 'decoder': 'h264_cuvid', 'platform': 'nvidia',
+                  'tonemap_filter': 'tonemap_opencl'}
+        monkeypatch.setattr(gpu_utils, '_probe_gpu_acceleration', lambda: probes.append(1) or dict(nvidia))
+
+        monkeypatch.setattr(gpu_utils, '_gpu_cache', None)
+        assert gpu_utils.detect_gpu_acceleration() == nvidia
+        # Simulate a new process: only the file on disk is left
+        monkeypatch.setattr(gpu_utils, '_gpu_cache', None)
+        assert gpu_utils.detect_gpu_acceleration() == nvidia
+        assert len(probes) == 1
+
+        assert gpu_utils.detect_gpu_acceleration(force_refresh=True) == nvidia
+        assert len(probes) == 2
+
+    def test_failed_detection_is_not_stored(self, tmp_path, monkeypatch):
+        """Test that an ffmpeg failure is reported as no GPU but probed again next run"""
+        monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+        monkeypatch.setattr(gpu_utils, '_probe_gpu_acceleration', lambda: None)
+        monkeypatch.setattr(gpu_utils, '_gpu_cache', None)
+
+        assert gpu_utils.detect_gpu_acceleration()['available'] is False
+        assert not gpu_utils._gpu_cache_file().exists()
+
+    def test_tone_mapping_filter_must_work(self, monkeypatch):
+        """Test that a compiled-in filter without a usable device is not chosen"""
+        filters = b" ... tonemap_cuda      V->V  GPU tonemapping\n ... tonemap_opencl    V->V  OpenCL tonemapping\n"
+
+        def fake_run(cmd, **kwargs):
+            if '-filters' in cmd:
+                return subprocess.CompletedProcess(cmd, 0, filters, b'')
+            # No CUDA driver on this machine, OpenCL works
+            return subprocess.CompletedProcess(cmd, 0 if 'opencl=ocl' in cmd else 1)
+
+        monkeypatch.setattr(gpu_utils.subprocess, 'run', fake_run)
+        assert gpu_utils._probe_tonemap_filter('nvidia') == 'tonemap_opencl'
+
+
+class TestGpuEncoderParams:
+    """Test the encoder options per GPU platform"""
+
+    def test_nvenc_uses_constant_quality(self):
+        """Test that the CRF reaches NVENC through -cq in VBR mode with adaptive quantization"""
+        params = gpu_utils.get_gpu_encoder_params({'available': True, 'platform': 'nvidia'}, 22, 'slow')
+
+        assert params[params.index('-preset') + 1] == 'p7'
+        assert params[params.index('-rc') + 1] == 'vbr'
+        assert params[params.index('-cq') + 1] == '22'
+        assert '-spatial_aq' in params
+
+    def test_amd_encoder(self):
+        """Test that AMF gets the CRF as constant QP for all frame types"""
+        params = gpu_utils.get_gpu_encoder_params({'available': True, 'platform': 'amd'}, 20, 'medium')
+
+        assert params[params.index('-c:v') + 1] == 'h264_amf'
+        assert [params[params.index(f'-qp_{t}') + 1] for t in 'ipb'] == ['20', '20', '20']
@@ -0,0 +1,34 @@
+"""
+Test the lightweight worker result models
+"""
+
+from pathlib import Path
+from lib.media_analyzer import media_info_from_discovery
+from lib.models_fast import FastMediaInfo
+from lib.language_utils import Action
+
+
+HDR_INFO = {
+    'container': 'mp4',
+    'has_video': True,
+    'video_codec': 'h264',
+    'video_stream': {'codec_type': 'video', 'codec_name': 'h264', 'color_transfer': 'smpte2084',
+                     'color_primaries': 'bt2020', 'side_data_list': [{'side_data_type': 'Mastering display metadata'}]},
+    'has_audio': True,
+    'audio_streams': [{'codec_type': 'audio', 'codec_name': 'aac', 'channels': 2, 'tags': {'language': 'ger'}},
+                      {'codec_type': 'audio', 'codec_name': 'aac', 'channels': 2}],
+    'subtitle_streams': [{'codec_type': 'subtitle', 'codec_name': 'mov_text', 'tags': {'language': 'eng'}}],
+}
+
+
+class TestFastMediaInfo:
+    """Test that worker results validate into the same model as the sequential path"""
+
+    def test_matches_media_info_from_discovery(self):
+        """Test that HDR metadata and subtitles survive the round trip"""
+        path = Path('movie.mp4')
+        fast = FastMediaInfo.from_discovery(path, HDR_INFO).to_pydantic()
+        full = media_info_from_discovery(path, HDR_INFO)
+
+        assert fast.model_dump() == full.model_dump()
+        assert fast.get_required_action() == full.get_required_action() == Action.TRANCODE_VIDEO
@@ -0,0 +1,67 @@
+"""
+Test the process pool used for --workers
+"""
+
+import signal
+from unittest.mock import patch
+
+from lib.models import ProcessingConfig
+from lib.parallel_processor import ParallelProcessor
+
+
+def _worker_signal_handlers():
+    return signal.getsignal(signal.SIGINT), signal.getsignal(signal.SIGTERM).__name__
+
+
+class TestWorkerSignals:
+    """Test that interrupts are handled by the parent, not by the pool workers"""
+
+    def test_workers_do_not_inherit_parent_handler(self):
+        """Test that workers ignore Ctrl+C and only stop their own ffmpeg on SIGTERM"""
+        processor = ParallelProcessor(max_workers=1)
+        try:
+            sigint, sigterm = processor._get_pool(1).submit(_worker_signal_handlers).result()
+        finally:
+            processor.close()
+
+        assert sigint == signal.SIG_IGN
+        assert sigterm == 'worker_signal_handler'
+
+    def test_cancel_sets_stop_event(self):
+        """Test that closing with cancel_pending tells the workers to stop"""
+        processor = ParallelProcessor(max_workers=1)
+        processor._get_pool(1)
+        stop_event = processor._stop_event
+        processor.close(cancel_pending=True)
+
+        assert stop_event.is_set()
+
+    def test_pool_after_cancel_gets_fresh_stop_event(self):
+        """Test that a pool created after a cancel does not inherit the set stop event"""
+        processor = ParallelProcessor(max_workers=1)
+        processor._get_pool(1)
+        processor.close(cancel_pending=True)
+        processor._get_pool(1)
+
+        try:
+            assert not processor._stop_event.is_set()
+        finally:
+            processor.close()
+
+
+class TestWorkerOutput:
+    """Test that worker output is recorded for replay instead of reaching the terminal"""
+
+    def test_plain_prints_are_recorded(self, tmp_path, capsys):
+        """Test that print() output of a worker ends up in the recorded log"""
+        def process_file(*args):
+            print('\nProzess wurde unterbrochen')
+            return 'interrupted', True
+
+        with patch('lib.parallel_processor.process_file', process_file):
+            result, log = ParallelProcessor._process_single_file_wrapper(
+                tmp_path / 'movie.mkv', None, ProcessingConfig(), None)
+
+        assert result == 'interrupted'
+        assert 'Prozess wurde unterbrochen' in log
+        assert capsys.readouterr().out == ''
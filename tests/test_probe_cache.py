@@ -0,0 +1,69 @@
+"""
+Test the persistent ffprobe result cache
+"""
+
+from lib import probe_cache
+
+
+class TestProbeCache:
+    """Test lookup/store of cached ffprobe results"""
+
+    def test_roundtrip_and_invalidation(self, tmp_path):
+        """Test that a stored result is only returned while the file is unchanged"""
+        probe_cache.open_probe_cache(tmp_path / 'probe.sqlite')
+        media = tmp_path / 'movie.mkv'
+        media.write_bytes(b'x' * 10)
+        st = media.stat()
+        streams = [{'codec_type': 'video', 'codec_name': 'h264'}]
+
+        assert probe_cache.lookup_probe(media, st) is None
+        probe_cache.store_probe(media, st, streams, 12.5)
+        assert probe_cache.lookup_probe(media, st) == (streams, 12.5)
+
+        # Reopening flushes the buffered batch to the database
+        probe_cache.open_probe_cache(tmp_path / 'probe.sqlite')
+        assert probe_cache.lookup_probe(media, st) == (streams, 12.5)
+
+        media.write_bytes(b'x' * 20)
+        assert probe_cache.lookup_probe(media, media.stat()) is None
+
+    def test_disabled_by_empty_env(self, tmp_path, monkeypatch):
+        """Test that an empty PLEX_DP_PROBE_CACHE only keeps results for the current run"""
+        monkeypatch.setenv(probe_cache.PROBE_CACHE_ENV, '')
+        assert probe_cache.open_probe_cache() is None
+        media = tmp_path / 'movie.mp4'
+        media.write_bytes(b'x')
+        probe_cache.store_probe(media, media.stat(), [], 3.0)
+        assert probe_cache.lookup_probe(media, media.stat()) == ([], 3.0)
+
+        media.write_bytes(b'xy')
+        assert probe_cache.lookup_probe(media, media.stat()) is None
+
+    def test_refresh_ignores_stored_results(self, tmp_path):
+        """Test that refresh mode probes again once and then reuses the new result"""
+        probe_cache.open_probe_cache(tmp_path / 'probe.sqlite')
+        media = tmp_path / 'movie.mkv'
+        media.write_bytes(b'x')
+        st = media.stat()
+        probe_cache.store_probe(media, st, [{'codec_type': 'video'}], 1.0)
+
+        probe_cache.open_probe_cache(tmp_path / 'probe.sqlite', refresh=True)
+        assert probe_cache.lookup_probe(media, st) is None
+        probe_cache.store_probe(media, st, [], 2.0)
+        assert probe_cache.lookup_probe(media, st) == ([], 2.0)
+
+        probe_cache.open_probe_cache(tmp_path / 'probe.sqlite')
+        assert probe_cache.lookup_probe(media, st) == ([], 2.0)
+
+    def test_unusable_database_keeps_results_in_memory(self, tmp_path):
+        """Test that results survive a flush when the database cannot be opened"""
+        blocker = tmp_path / 'not_a_dir'
+        blocker.write_bytes(b'')
+        probe_cache.open_probe_cache(blocker / 'probe.sqlite')
+        media = tmp_path / 'movie.mkv'
+        media.write_bytes(b'x')
+        st = media.stat()
+
+        probe_cache.store_probe(media, st, [], 4.0)
+        probe_cache.flush_probe_cache()
+        assert probe_cache.lookup_probe(media, st) == ([], 4.0)
@@ -0,0 +1,88 @@
+"""
+Test process_file() around the ffmpeg run
+"""
+
+import time
+from unittest.mock import patch
+
+from lib import processor
+from lib.processor import process_file
+
+NVIDIA = {'available': True, 'encoder': 'h264_nvenc', 'decoder': 'h264_cuvid', 'platform': 'nvidia',
+          'tonemap_filter': 'tonemap_cuda'}
+
+HDR_INFO = {
+    'has_video': True, 'has_audio': True, 'container': 'mkv', 'video_codec': 'hevc', 'is_hdr': True,
+    'video_stream': {'codec_name': 'hevc', 'color_transfer': 'smpte2084'},
+    'audio_codecs': ['aac'], 'audio_channels': [2], 'audio_languages': ['de'],
+    'audio_streams': [{'codec_name': 'aac', 'channels': 2, 'tags': {'language': 'ger'}}],
+    'subtitle_streams': [], 'duration': 10.0,
+}
+
+
+def fake_run(calls, fail_if=None):
+    """Stand-in for run() that records commands and writes the output file"""
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        if fail_if and fail_if(cmd):
+            return 1, '', 'Impossible to convert between the formats'
+        with open(cmd[-1], 'w') as f:
+            f.write(str(len(calls)))
+        return 0, '', ''
+    return run
+
+
+class TestHardwareToneMappingFallback:
+    """Test the software retry when GPU tone mapping fails for a file"""
+
+    def test_retry_with_software_tone_mapping(self, tmp_path):
+        """Test that a failed CUDA run is repeated once with the zscale chain"""
+        src = tmp_path / 'movie.mkv'
+        src.write_bytes(b'x')
+        calls = []
+
+        with patch('lib.processor.run', fake_run(calls, lambda cmd: '-hwaccel' in cmd)):
+            result, _ = process_file(src, tmp_path, 22, 'medium', False, auto_yes=True, gpu_info=NVIDIA,
+                                     use_gpu=True, precomputed_info=HDR_INFO)
+
+        assert result == 'processed'
+        assert len(calls) == 2
+        assert '-hwaccel' not in calls[1]
+        assert calls[1][calls[1].index('-vf') + 1].startswith('zscale=')
+        assert calls[1][calls[1].index('-c:v') + 1] == 'h264_nvenc'
+        assert (tmp_path / 'movie.mp4').exists()
+
+
+class TestDeferredFinalize:
+    """Test the background finalize step of sequential batches"""
+
+    def test_same_stem_waits_for_previous_finalize(self, tmp_path):
+        """Test that movie.avi is renamed to movie.mp4 before movie.mkv writes the same convert file"""
+        info = dict(HDR_INFO, is_hdr=False, video_codec='h264', container='avi',
+                    video_stream={'codec_name': 'h264'})
+        first, second = tmp_path / 'movie.avi', tmp_path / 'movie.mkv'
+        first.write_bytes(b'avi')
+        second.write_bytes(b'mkv')
+        calls = []
+        seen = []
+        finalize_output = processor._finalize_output
+
+        def slow_finalize(*args):
+            time.sleep(0.2)
+            return finalize_output(*args)
+
+        def run(cmd, **kwargs):
+            seen.append((first.exists(), (tmp_path / 'movie.mp4').exists()))
+            return fake_run(calls)(cmd, **kwargs)
+
+        with patch('lib.processor.run', run), patch('lib.processor._finalize_output', slow_finalize):
+            for src in (first, second):
+                result, _ = process_file(src, tmp_path, 22, 'medium', False, auto_yes=True,
+                                         precomputed_info=info, defer_finalize=True)
+                assert result == 'processed'
+            assert processor.wait_for_finalize() == 0
+
+        # The second run only started after the first original was replaced
+        assert seen == [(True, False), (False, True)]
+        assert (tmp_path / 'movie.mp4').read_text() == '2'
+        assert not second.exists() and not (tmp_path / 'convert.movie.mp4').exists()